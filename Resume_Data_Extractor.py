@@ -1,8 +1,51 @@
+import io
+import hashlib
 import json
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import fitz
 import docx
+from resume_text import normalised_lines, preprocess_resume_text
+from telemetry import span, traced
+
+# Guards against oversized uploads (portfolio PDFs, scanned CVs)
+MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "50"))
+MAX_BYTES = int(os.getenv("EXTRACT_MAX_MB", "20")) * 1024 * 1024
+# Page-parallel PDF extraction kicks in above this many pages per worker
+PAGES_PER_TASK = 8
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "1"))
+EXTRACT_CACHE_SIZE = int(os.getenv("EXTRACT_CACHE_SIZE", "32"))
+
+# Extracted text keyed by file content hash, survives Streamlit reruns
+_extraction_cache = OrderedDict()
+_extraction_cache_lock = threading.Lock()
+
+class ExtractionLimitError(ValueError):
+    pass
+
+class _NamedBytes(io.BytesIO):
+    """Raw file bytes that look like a Streamlit UploadedFile to extract_text."""
+    def __init__(self, name, data, file_type=None):
+        super().__init__(data)
+        self.name = name
+        self.type = file_type or mimetypes.guess_type(name)[0] or ""
+
+def _pdf_page_lines(data, start, stop):
+    # Runs in a worker process, each worker opens its own document
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return [line for i in range(start, stop) for line in normalised_lines(doc[i].get_text())]
+
+def _read_limited(uploaded_file, max_bytes):
+    data = uploaded_file.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ExtractionLimitError(f"File is larger than {max_bytes // (1024 * 1024)} MB")
+    return data
 
 class Data_Extractor:
+    @traced("extract_text")
     def extract_text(uploaded_file):
         file_type = uploaded_file.type
         name = uploaded_file.name.lower()
@@ -21,7 +64,82 @@ class Data_Extractor:
             return "\n".join([para.text for para in doc.paragraphs])
         return "⚠️ Unsupported file type."
 
-    def preprocess_resume_text(text):
-        text = text.replace("\r\n", "\n").replace("\r", "\n")
-        text = "\n".join([line.strip() for line in text.splitlines() if line.strip()])
+    def iter_lines(uploaded_file, max_pages=MAX_PAGES, max_bytes=MAX_BYTES, workers=EXTRACT_WORKERS):
+        """Yield normalised resume lines page by page.
+
+        Normalisation (line endings, stripping, dropping blank lines) happens in
+        the same pass, so no full-document string is built. Multi-page PDFs are
+        split across ``workers`` processes when there are enough pages.
+        Raises ExtractionLimitError past ``max_pages`` / ``max_bytes``.
+        """
+        file_type = uploaded_file.type
+        name = uploaded_file.name.lower()
+
+        if file_type == "application/pdf" or name.endswith(".pdf"):
+            data = _read_limited(uploaded_file, max_bytes)
+            with fitz.open(stream=data, filetype="pdf") as doc:
+                page_count = doc.page_count
+                if page_count > max_pages:
+                    raise ExtractionLimitError(f"Document has {page_count} pages, limit is {max_pages}")
+                if workers <= 1 or page_count < workers * PAGES_PER_TASK:
+                    for page in doc:
+                        yield from normalised_lines(page.get_text())
+                    return
+
+            step = -(-page_count // workers)
+            ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_pdf_page_lines, data, start, stop) for start, stop in ranges]
+                for future in futures:
+                    yield from future.result()
+        elif file_type == "text/plain" or name.endswith(".txt"):
+            read = 0
+            for raw in uploaded_file:
+                read += len(raw)
+                if read > max_bytes:
+                    raise ExtractionLimitError(f"File is larger than {max_bytes // (1024 * 1024)} MB")
+                yield from normalised_lines(raw.decode("utf-8"))
+        elif file_type == "application/json" or name.endswith(".json"):
+            data = json.loads(_read_limited(uploaded_file, max_bytes))
+            yield from normalised_lines(json.dumps(data, indent=2))
+        elif name.endswith(".docx"):
+            from docx import Document
+            doc = Document(io.BytesIO(_read_limited(uploaded_file, max_bytes)))
+            for para in doc.paragraphs:
+                yield from normalised_lines(para.text)
+        else:
+            raise ValueError("Unsupported file type")
+
+    def extract_normalised_text(uploaded_file, **limits):
+        """Extracted and preprocessed text in one pass, see iter_lines."""
+        with span("extract_text"):
+            return "\n".join(Data_Extractor.iter_lines(uploaded_file, **limits))
+
+    def extract_bytes(name, data, **limits):
+        """Normalised text from raw file bytes, e.g. read from disk or a zip archive."""
+        return Data_Extractor.extract_normalised_text(_NamedBytes(name, data), **limits)
+
+    def extract_cached(uploaded_file, **limits):
+        """extract_normalised_text memoised on the file's content hash.
+
+        Streamlit reruns the page on every widget change, this keeps each
+        upload from being parsed again on every rerun.
+        """
+        data = uploaded_file.getvalue() if hasattr(uploaded_file, "getvalue") else uploaded_file.read()
+        key = (hashlib.sha256(data).hexdigest(), uploaded_file.name.lower(), tuple(sorted(limits.items())))
+        with _extraction_cache_lock:
+            if key in _extraction_cache:
+                _extraction_cache.move_to_end(key)
+                return _extraction_cache[key]
+
+        text = Data_Extractor.extract_normalised_text(
+            _NamedBytes(uploaded_file.name, data, getattr(uploaded_file, "type", None)), **limits
+        )
+        with _extraction_cache_lock:
+            _extraction_cache[key] = text
+            while len(_extraction_cache) > EXTRACT_CACHE_SIZE:
+                _extraction_cache.popitem(last=False)
         return text
+
+    def preprocess_resume_text(text):
+        return preprocess_resume_text(text)
@@ -1,11 +1,132 @@
 import tempfile
 import subprocess
-import whisper
+import sys
+import threading
+import queue
+import time
+import numpy as np
+import requests
 import os
+from telemetry import span
+
+SAMPLE_RATE = 16000
+PCM_CONTENT_TYPE = "audio/x-f32le"
+
+# When set, transcription is delegated to the shared worker service
+# (transcription_service.py) instead of a model inside this process
+SERVICE_URL = os.getenv("TRANSCRIBE_SERVICE_URL")
+SERVICE_TIMEOUT = float(os.getenv("TRANSCRIBE_SERVICE_TIMEOUT", "120"))
+SERVICE_RETRIES = 3
+
+# Model size can be overridden per deployment, e.g. WHISPER_MODEL=base
+DEFAULT_MODEL = os.getenv("WHISPER_MODEL", "tiny")
+DEFAULT_DEVICE = os.getenv("WHISPER_DEVICE") or None
+
+# Process-wide registry of loaded models keyed by (model name, device)
+_models = {}
+_models_lock = threading.Lock()
+
+
+def _patch_torch_classes():
+    # torch.classes breaks Streamlit's module watcher; torch first loads here, with whisper
+    import torch
+    if hasattr(torch, "_classes"):
+        sys.modules["torch.classes"] = torch._classes
+
+
+def get_model(name=None, device=None):
+    """Return the shared Whisper model, loading it on first use."""
+    key = (name or DEFAULT_MODEL, device or DEFAULT_DEVICE)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _models_lock:
+        # Another thread may have finished loading while we waited
+        model = _models.get(key)
+        if model is None:
+            import whisper
+            _patch_torch_classes()
+            model = whisper.load_model(key[0], device=key[1])
+            _models[key] = model
+    return model
+
+
+def warm_up(name=None, device=None, background=False):
+    """Load the model ahead of the first answer (optionally in a daemon thread)."""
+    if background:
+        thread = threading.Thread(target=get_model, args=(name, device), daemon=True)
+        thread.start()
+        return thread
+    return get_model(name, device)
+
+
+def decode_audio(audio_bytes):
+    """Decode encoded audio bytes to 16 kHz mono float32 PCM entirely in memory."""
+    proc = subprocess.run([
+        "ffmpeg", "-nostdin",
+        "-i", "pipe:0",
+        "-ar", str(SAMPLE_RATE),
+        "-ac", "1",
+        "-f", "f32le",
+        "pipe:1"
+    ], input=audio_bytes, capture_output=True, check=True)
+    # Copy so torch gets a writable buffer
+    return np.frombuffer(proc.stdout, dtype=np.float32).copy()
+
+
+def transcribe_remote(payload, content_type="application/octet-stream"):
+    """Send audio to the transcription service, backing off while its queue is full."""
+    for attempt in range(SERVICE_RETRIES):
+        response = requests.post(
+            f"{SERVICE_URL.rstrip('/')}/transcribe/",
+            data=payload,
+            headers={"Content-Type": content_type},
+            timeout=SERVICE_TIMEOUT
+        )
+        if response.status_code == 503 and attempt < SERVICE_RETRIES - 1:
+            time.sleep(0.5 * 2 ** attempt)
+            continue
+        if response.status_code != 200:
+            raise RuntimeError(f"Transcription service error: {response.status_code} - {response.text}")
+        return response.json()["text"]
+
 
 class Voice_Transcriber:
     @staticmethod
-    def convert_and_transcribe(audio_bytes):
+    def convert_and_transcribe(audio_bytes, model_name=None):
+        if SERVICE_URL:
+            with span("transcribe", mode="remote"):
+                return transcribe_remote(audio_bytes)
+        with span("transcribe", mode="local"):
+            return Voice_Transcriber.transcribe_local(audio_bytes, model_name)
+
+    @staticmethod
+    def transcribe_pcm(audio, model_name=None, **options):
+        """Transcribe 16 kHz mono float32 samples."""
+        if SERVICE_URL:
+            return transcribe_remote(audio.astype(np.float32, copy=False).tobytes(), PCM_CONTENT_TYPE)
+        return get_model(model_name).transcribe(audio, **options)["text"]
+
+    @staticmethod
+    def transcribe_local(audio_bytes, model_name=None):
+        model = get_model(model_name)
+        try:
+            with span("ffmpeg_decode"):
+                audio = decode_audio(audio_bytes)
+        except subprocess.CalledProcessError:
+            audio = None
+
+        # Some containers need a seekable input, fall back to the temp-file path
+        if audio is None or audio.size == 0:
+            return Voice_Transcriber.convert_and_transcribe_file(audio_bytes, model_name)
+
+        with span("whisper"):
+            result = model.transcribe(audio)
+        return result["text"]
+
+    @staticmethod
+    def convert_and_transcribe_file(audio_bytes, model_name=None):
         # Save the raw WebM audio to a temporary file
         with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as raw_audio_file:
             raw_audio_file.write(audio_bytes)
@@ -20,14 +141,14 @@ class Voice_Transcriber:
             subprocess.run([
                 "ffmpeg", "-y",
                 "-i", raw_audio_path,
-                "-ar", "16000",  
-                "-ac", "1",     
+                "-ar", str(SAMPLE_RATE),
+                "-ac", "1",
                 "-f", "wav",
                 pcm_audio_path
             ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
-            # Load Whisper model and transcribe
-            model = whisper.load_model("tiny")
+            # Reuse the process-wide Whisper model and transcribe
+            model = get_model(model_name)
             result = model.transcribe(pcm_audio_path)
             return result["text"]
 
@@ -35,3 +156,105 @@ class Voice_Transcriber:
             # Clean up temp files
             os.remove(raw_audio_path)
             os.remove(pcm_audio_path)
+
+
+class StreamingTranscriber:
+    """Cut live 16 kHz audio at pauses and transcribe each chunk in the background.
+
+    Chunks are closed once they hold ``min_chunk`` seconds of audio followed by
+    ``min_silence`` seconds below ``silence_threshold`` RMS (or hit ``max_chunk``),
+    so by the time recording stops only the tail chunk is still pending.
+    """
+
+    def __init__(self, model_name=None, silence_threshold=0.01, min_silence=0.6,
+                 min_chunk=2.0, max_chunk=30.0):
+        self.model_name = model_name
+        self.silence_threshold = silence_threshold
+        self.min_silence = int(min_silence * SAMPLE_RATE)
+        self.min_chunk = int(min_chunk * SAMPLE_RATE)
+        self.max_chunk = int(max_chunk * SAMPLE_RATE)
+
+        self._buffer = []
+        self._buffered = 0
+        self._silent_run = 0
+        self._has_speech = False
+        self._texts = []
+        self._error = None
+        self._resampler = None
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def feed(self, pcm):
+        """Append 16 kHz mono float32 samples."""
+        if pcm.size == 0:
+            return
+        rms = float(np.sqrt(np.mean(np.square(pcm))))
+        with self._lock:
+            self._buffer.append(pcm)
+            self._buffered += pcm.size
+            if rms < self.silence_threshold:
+                self._silent_run += pcm.size
+            else:
+                self._silent_run = 0
+                self._has_speech = True
+
+            at_pause = self._buffered >= self.min_chunk and self._silent_run >= self.min_silence
+            if at_pause or self._buffered >= self.max_chunk:
+                self._flush()
+
+    def feed_frame(self, frame):
+        """Append an av.AudioFrame as delivered by streamlit-webrtc."""
+        if self._resampler is None:
+            import av
+            self._resampler = av.AudioResampler(format="flt", layout="mono", rate=SAMPLE_RATE)
+        for resampled in self._resampler.resample(frame):
+            self.feed(resampled.to_ndarray().reshape(-1).astype(np.float32, copy=False))
+
+    def partial_text(self):
+        with self._lock:
+            return " ".join(self._texts).strip()
+
+    def finish(self):
+        """Flush the tail chunk, wait for pending chunks and return the full transcript.
+
+        Re-raises the first chunk that failed to transcribe, so a partial
+        transcript is never returned as the whole answer.
+        """
+        with self._lock:
+            self._flush()
+        self._queue.put(None)
+        self._worker.join()
+        if self._error is not None:
+            raise self._error
+        return self.partial_text()
+
+    def _flush(self):
+        # Caller holds self._lock
+        if self._buffer and self._has_speech:
+            self._queue.put(np.concatenate(self._buffer))
+        self._buffer = []
+        self._buffered = 0
+        self._silent_run = 0
+        self._has_speech = False
+
+    def _run(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            if self._error is not None:
+                # Keep draining so feed() never backs up, finish() reports the error
+                continue
+            # Condition each chunk on what was already said for smoother joins
+            previous = self.partial_text()
+            try:
+                text = Voice_Transcriber.transcribe_pcm(
+                    chunk, self.model_name, initial_prompt=previous[-200:] or None
+                )
+            except Exception as e:
+                self._error = e
+                continue
+            with self._lock:
+                self._texts.append(text.strip())
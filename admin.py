@@ -1,11 +1,17 @@
 import streamlit as st
 import requests
-from Resume_Data_Extractor import Data_Extractor as DE
-from db_utils import save_parsed_resume
+from Resume_Data_Extractor import Data_Extractor as DE, ExtractionLimitError
+from db_utils import save_parsed_resume, search_candidates, list_positions
+from db_migrate import schema_status
 from auth import login_page
+from bulk_ingest import ingest, iter_zip
+import opening_questions
 
 def main_admin_panel():
     st.set_page_config(page_title="Admin Panel", page_icon="🛠️", layout="wide")
+    schema_problem = schema_status.problem()
+    if schema_problem:
+        st.error(schema_problem)
     
     # Sidebar
     with st.sidebar:
@@ -18,6 +24,95 @@ def main_admin_panel():
     
     st.header("📄 Resume Upload Portal")
 
+    mode = st.radio("Mode", ["Single resume", "Bulk upload", "Browse candidates"], horizontal=True)
+    if mode == "Bulk upload":
+        bulk_upload_panel()
+    elif mode == "Browse candidates":
+        candidates_panel()
+    else:
+        single_upload_panel()
+
+def bulk_upload_panel():
+    position = st.text_input("Position Applied For (all resumes)")
+    uploaded_files = st.file_uploader(
+        "Upload Resumes (PDF/DOCX/TXT or ZIP archives)",
+        type=["pdf", "docx", "txt", "zip"],
+        accept_multiple_files=True
+    )
+    if not uploaded_files:
+        st.info("Upload several resumes or a zip archive; contact details are read from each resume")
+        return
+
+    if st.button("Process All Resumes"):
+        files = []
+        for uploaded in uploaded_files:
+            data = uploaded.getvalue()
+            if uploaded.name.lower().endswith(".zip"):
+                files.extend(iter_zip(uploaded.name, data))
+            else:
+                files.append((uploaded.name, data))
+
+        progress = st.progress(0.0, text=f"Processing {len(files)} resumes...")
+        report, summary = ingest(
+            files,
+            position=position,
+            processed_by=st.session_state.admin["username"],
+            progress=lambda done, total: progress.progress(done / total, text=f"{done}/{total} processed")
+        )
+        st.success(
+            f"Saved {summary['saved']}/{summary['files']} resumes in {summary['seconds']}s "
+            f"({summary['resumes_per_sec']} resumes/sec)"
+        )
+        if summary["failed"]:
+            st.error(f"{summary['failed']} resumes failed, see the report below")
+        st.dataframe(report, use_container_width=True)
+
+PAGE_SIZE = 50
+
+@st.cache_data(ttl=300)
+def cached_positions():
+    return list_positions()
+
+def candidates_panel():
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        position = st.selectbox("Position", [""] + cached_positions(), format_func=lambda p: p or "All positions")
+    with col2:
+        prefix = st.text_input("Email or name starts with")
+    with col3:
+        skills = st.text_input("Skills", placeholder="e.g. python kafka")
+
+    # Restart paging whenever the filters change; pages holds the cursor of each visited page
+    filters = (position, prefix.strip(), skills.strip())
+    if st.session_state.get("candidate_filters") != filters:
+        st.session_state["candidate_filters"] = filters
+        st.session_state["candidate_pages"] = [None]
+    pages = st.session_state["candidate_pages"]
+
+    rows, next_cursor = search_candidates(
+        position=position or None,
+        prefix=prefix.strip() or None,
+        skills=skills.strip() or None,
+        cursor=pages[-1],
+        limit=PAGE_SIZE
+    )
+    if not rows:
+        st.info("No candidates match these filters")
+    else:
+        st.caption(f"Page {len(pages)}")
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+
+    prev_col, next_col = st.columns(2)
+    with prev_col:
+        if st.button("⬅️ Previous", disabled=len(pages) == 1):
+            pages.pop()
+            st.rerun()
+    with next_col:
+        if st.button("Next ➡️", disabled=next_cursor is None):
+            pages.append(next_cursor)
+            st.rerun()
+
+def single_upload_panel():
     col1, col2 = st.columns(2)
     with col1:
         name = st.text_input("Full Name*")
@@ -29,7 +124,11 @@ def main_admin_panel():
     uploaded_file = st.file_uploader("Upload Resume (PDF/DOCX/TXT)*", type=["pdf", "docx", "txt"])
 
     if uploaded_file and name and email and phone:
-        file_text = DE.extract_text(uploaded_file)
+        try:
+            file_text = DE.extract_cached(uploaded_file)
+        except (ExtractionLimitError, ValueError) as e:
+            st.error(f"Could not read resume: {e}")
+            return
 
         with st.expander("View Extracted Resume Text"):
             st.text_area("Raw Text", value=file_text, height=200, label_visibility="collapsed")
@@ -39,12 +138,13 @@ def main_admin_panel():
                 try:
                     response = requests.post(
                         "http://127.0.0.1:8000/parse-resume/",
-                        json={"resume_text": file_text},
-                        timeout=30
+                        json={"resume_text": file_text, "structured": True},
+                        timeout=60
                     )
                     
                     if response.status_code == 200:
-                        parsed_data = response.json()
+                        # Validated resume object, stored as is; usage/cache metadata is dropped
+                        parsed_data = response.json()["result"]
                         full_data = {
                             "contact_info": {
                                 "name": name,
@@ -59,6 +159,8 @@ def main_admin_panel():
 
                         success, message = save_parsed_resume(full_data, primary_key=email)
                         if success:
+                            # First questions and audio are ready before the interview starts
+                            opening_questions.schedule(email, parsed_data)
                             st.success(f"Resume processed successfully for {email}!")
                             st.json(parsed_data)
                         else:
@@ -81,5 +183,8 @@ if st.session_state.get("show_admin_panel") and st.session_state.get("authentica
     main_admin_panel()
 else:
     st.set_page_config(page_title="Admin Portal", page_icon="🔒")
+    schema_problem = schema_status.problem()
+    if schema_problem:
+        st.error(schema_problem)
     st.title("Admin Portal")
     login_page()
\ No newline at end of file
@@ -1,18 +1,40 @@
 import streamlit as st
-import sys
-import torch
 import requests
-import base64
 import json
+import os
+import queue
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from streamlit_mic_recorder import mic_recorder
-from Voice_transcriber import Voice_Transcriber as VT
-from tts_engine import text_to_speech
-from db_utils import SessionLocal, Resume
+# Both load their heavy dependencies (whisper/torch, pyttsx3) on first use or warm-up
+from Voice_transcriber import Voice_Transcriber as VT, StreamingTranscriber, SERVICE_URL as TRANSCRIBE_SERVICE_URL, warm_up as warm_up_whisper
+from tts_engine import text_to_speech_clip, audio_mime_type, DEFAULT_FORMAT as TTS_FORMAT, warm_up as warm_up_tts
+from db_utils import get_interview_candidate, get_opening_question, resume_hash
+from db_migrate import schema_status
+from telemetry import CORRELATION_HEADER, correlation_id, new_correlation_id, start_metrics_server, traced
 
-# Fix for torch.classes error in Streamlit
-if hasattr(torch, "_classes"):
-    sys.modules["torch.classes"] = torch._classes
+BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
+
+# Render questions token by token and speak them sentence by sentence
+STREAM_QUESTIONS = os.getenv("STREAM_QUESTIONS", "1") == "1"
+SENTENCE_END = re.compile(r"[.?!](?=\s)")
+
+# Plays the newest question clip once the one before it has finished
+CHAIN_AUDIO_JS = """
+<script>
+const clips = window.parent.document.querySelectorAll('div[data-testid="stAudio"] audio');
+const last = clips[clips.length - 1];
+const prev = clips[clips.length - 2];
+if (last) {
+    if (!prev || prev.ended) { last.play(); }
+    else { prev.addEventListener("ended", () => last.play(), { once: true }); }
+}
+</script>
+"""
+
+# Transcribe while the candidate is still speaking instead of after they stop
+STREAMING_TRANSCRIPTION = os.getenv("STREAMING_TRANSCRIPTION", "0") == "1"
 
 # Set page config
 st.set_page_config(
@@ -31,6 +53,10 @@ st.markdown("""
         .stApp {
             padding-right: 15px;
         }
+        /* Question audio autoplays without showing a player */
+        div[data-testid="stAudio"] {
+            display: none;
+        }
     </style>
 """, unsafe_allow_html=True)
 
@@ -44,53 +70,257 @@ def init_session_state():
         'audio_trigger': False,
         'new_question_ready': False,
         'candidate_email_input': "",
-        'candidate_info': None
+        'candidate_info': None,
+        'stream_transcriber': None,
+        'question_audio': None,
+        'interview_session': None,
+        'opening_question': None,
+        'correlation_id': new_correlation_id()
     }
     for key, value in session_vars.items():
         if key not in st.session_state:
             st.session_state[key] = value
 
 init_session_state()
+# Tags spans in this run and every backend request with the session's ID
+correlation_id.set(st.session_state.correlation_id)
 
-# Helper Functions
-def parse_resume_data(resume_data):
-    if isinstance(resume_data, dict):
-        return resume_data
-    elif isinstance(resume_data, str):
-        try:
-            return json.loads(resume_data)
-        except json.JSONDecodeError:
-            start_idx = resume_data.find('{')
-            end_idx = resume_data.rfind('}') + 1
-            if start_idx != -1 and end_idx != 0:
-                return json.loads(resume_data[start_idx:end_idx])
-            raise ValueError("Invalid JSON format in resume data")
-    raise TypeError("Resume data must be either dict or JSON string")
+def backend_headers():
+    return {CORRELATION_HEADER: st.session_state.correlation_id}
+
+# Optional Prometheus endpoint for the app-side stages (transcription, TTS, DB)
+@st.cache_resource
+def start_app_metrics(port):
+    return start_metrics_server(port)
+
+if os.getenv("APP_METRICS_PORT"):
+    start_app_metrics(int(os.getenv("APP_METRICS_PORT")))
 
+# Load the Whisper model once per process, before the first answer arrives
+@st.cache_resource
+def start_whisper_warm_up():
+    return warm_up_whisper(background=True)
+
+# Not needed when the shared transcription service owns the models
+if os.getenv("WHISPER_WARMUP", "1") == "1" and not TRANSCRIBE_SERVICE_URL:
+    start_whisper_warm_up()
+
+# The speech engine is needed as soon as the first question arrives
+@st.cache_resource
+def start_tts_warm_up():
+    return warm_up_tts(background=True)
+
+start_tts_warm_up()
+
+# Checked in the background, the first render doesn't wait for the DB
+schema_problem = schema_status.problem()
+if schema_problem:
+    st.error(f"❌ {schema_problem}")
+
+# Helper Functions
+@traced("fetch_candidate")
 def fetch_candidate(email):
-    db = SessionLocal()
+    problem = schema_status.problem(wait=True)
+    if problem:
+        return None, problem
     try:
-        resume_record = db.query(Resume).filter(Resume.email == email).first()
-        if not resume_record:
+        record = get_interview_candidate(email)
+        if not record:
             return None, "Candidate not found"
-        
-        parsed_data = parse_resume_data(resume_record.full_data)
+
+        # Stored as a validated object at ingest, nothing to re-parse here
+        parsed_data = record["parsed_data"]
         candidate_info = {
-            "name": resume_record.name,
-            "email": resume_record.email,
-            "phone": resume_record.phone,
-            "position": resume_record.position,
-            "created_at": resume_record.created_at
+            "name": record["name"],
+            "email": record["email"],
+            "phone": record["phone"],
+            "position": record["position"],
+            "created_at": record["created_at"]
         }
-        
+
+        # Pre-generated at ingest for this exact resume; None falls back to live generation
+        opening_question = get_opening_question(email, resume_hash(parsed_data))
+
         return {
             "parsed_resume": parsed_data,
-            "candidate_info": candidate_info
+            "candidate_info": candidate_info,
+            "opening_question": opening_question
         }, None
     except Exception as e:
         return None, str(e)
+
+# Background TTS so a question renders before its audio is ready
+@st.cache_resource
+def get_tts_executor():
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="tts")
+
+def speak(text):
+    """Compressed clip for the browser, plain WAV if ffmpeg can't encode it."""
+    audio_bytes, audio_format = text_to_speech_clip(text, output_format=TTS_FORMAT)
+    return audio_bytes, audio_mime_type(audio_format)
+
+def set_question(question):
+    """Store the new question and start synthesizing it right away."""
+    st.session_state.last_question = question
+    st.session_state.question_audio = get_tts_executor().submit(speak, question)
+    st.session_state.audio_trigger = True
+
+def ready_clip(audio_bytes, mime_type):
+    """Already synthesized audio in the shape play_question_audio expects."""
+    future = Future()
+    future.set_result((audio_bytes, mime_type))
+    return future
+
+def play_question_audio(slot):
+    future = st.session_state.question_audio
+    if future is None:
+        future = get_tts_executor().submit(speak, st.session_state.last_question)
+    try:
+        audio_bytes, mime_type = future.result(timeout=60)
+        # Served by Streamlit's media endpoint under a content-hash URL,
+        # so the browser streams and caches it instead of a data URI
+        slot.audio(audio_bytes, format=mime_type, autoplay=True)
+    except Exception as e:
+        slot.warning(f"⚠️ Failed to speak question: {e}")
     finally:
-        db.close()
+        st.session_state.audio_trigger = False
+        st.session_state.question_audio = None
+
+def render_question(slot, number, text):
+    with slot.container():
+        st.subheader(f"🤖 Question {number}")
+        st.write(text)
+
+def play_clips(clips, futures, played, wait=False):
+    """Append finished clips in order, chaining each after the previous one."""
+    while played < len(futures) and (wait or futures[played].done()):
+        audio_bytes, mime_type = futures[played].result(timeout=60)
+        clips.audio(audio_bytes, format=mime_type, autoplay=played == 0)
+        if played:
+            with clips:
+                st.components.v1.html(CHAIN_AUDIO_JS, height=0)
+        played += 1
+    return played
+
+class SessionExpired(Exception):
+    pass
+
+def interview_session_path(suffix):
+    """Backend path for this interview, creating the server-side session on first use."""
+    if st.session_state.interview_session is None:
+        res = requests.post(
+            f"{BACKEND_URL}/sessions/",
+            json={
+                "email": st.session_state.candidate_email_input,
+                "opening_question": (st.session_state.opening_question or {}).get("question")
+            },
+            headers=backend_headers(),
+            timeout=30
+        )
+        if res.status_code != 200:
+            raise RuntimeError(f"Failed to start interview session: {res.text}")
+        st.session_state.interview_session = res.json()["session_id"]
+    return f"/sessions/{st.session_state.interview_session}{suffix}"
+
+def request_question(suffix, payload, number, question_slot, audio_slot):
+    """Ask the interview session for a question, recreating it once if it expired.
+
+    With STREAM_QUESTIONS the question is streamed into the slots as well.
+    """
+    for attempt in range(2):
+        path = interview_session_path(suffix)
+        try:
+            if STREAM_QUESTIONS:
+                return stream_question(path, payload, number, question_slot, audio_slot)
+            res = requests.post(f"{BACKEND_URL}{path}", json=payload, headers=backend_headers(), timeout=60)
+            if res.status_code == 404:
+                raise SessionExpired()
+            if res.status_code != 200:
+                raise RuntimeError(f"{res.status_code} - {res.text}")
+            return res.json()["question"]
+        except SessionExpired:
+            st.session_state.interview_session = None
+            if attempt:
+                raise RuntimeError("Interview session expired")
+
+def stream_question(path, payload, number, question_slot, audio_slot):
+    """Render a question as it streams from the backend and speak it.
+
+    The first sentence is sent to TTS as soon as it is complete and starts
+    playing while the rest of the question is still being generated.
+    """
+    executor = get_tts_executor()
+    clips = audio_slot.container()
+    text, spoken, futures, played = "", 0, [], 0
+
+    with requests.post(f"{BACKEND_URL}{path}stream", json=payload, headers=backend_headers(),
+                       stream=True, timeout=60) as res:
+        if res.status_code == 404:
+            raise SessionExpired()
+        if res.status_code != 200:
+            raise RuntimeError(f"{res.status_code} - {res.text}")
+        for line in res.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data: "):
+                continue
+            event = json.loads(line[len("data: "):])
+            if "error" in event:
+                raise RuntimeError(event["error"])
+            if event.get("done"):
+                break
+
+            text += event["token"]
+            render_question(question_slot, number, text + " ▌")
+            if not futures:
+                match = SENTENCE_END.search(text)
+                if match:
+                    spoken = match.end()
+                    futures.append(executor.submit(speak, text[:spoken].strip()))
+            played = play_clips(clips, futures, played)
+
+    render_question(question_slot, number, text.strip())
+    rest = text[spoken:].strip()
+    if rest:
+        futures.append(executor.submit(speak, rest))
+    play_clips(clips, futures, played, wait=True)
+    return text.strip()
+
+def stream_answer():
+    """Record over WebRTC, showing partial text as chunks finish.
+
+    Returns the final transcript once recording stops, otherwise None.
+    """
+    # Pulls in aiortc/av, only worth loading when streaming transcription is on
+    from streamlit_webrtc import webrtc_streamer, WebRtcMode
+
+    ctx = webrtc_streamer(
+        key=f"answer-{st.session_state.question_count}",
+        mode=WebRtcMode.SENDONLY,
+        audio_receiver_size=1024,
+        media_stream_constraints={"video": False, "audio": True}
+    )
+    partial = st.empty()
+    transcriber = st.session_state.stream_transcriber
+
+    if ctx.state.playing:
+        if transcriber is None:
+            transcriber = StreamingTranscriber()
+            st.session_state.stream_transcriber = transcriber
+        while ctx.audio_receiver:
+            try:
+                frames = ctx.audio_receiver.get_frames(timeout=1)
+            except queue.Empty:
+                continue
+            for frame in frames:
+                transcriber.feed_frame(frame)
+            partial.markdown(f"*{transcriber.partial_text()}*")
+        return None
+
+    # Recording stopped: only the tail chunk is left to decode
+    if transcriber is not None:
+        st.session_state.stream_transcriber = None
+        with st.spinner("Finishing transcription..."):
+            return transcriber.finish()
+    return None
 
 # Main App Interface
 st.title(":brain: AI Interviewer")
@@ -113,6 +343,8 @@ if st.button("Fetch & Start Interview"):
         else:
             st.session_state.parsed_resume = candidate_data["parsed_resume"]
             st.session_state.candidate_info = candidate_data["candidate_info"]
+            st.session_state.opening_question = candidate_data["opening_question"]
+            st.session_state.interview_session = None
             st.session_state.qa_started = True
             st.session_state.candidate_email_input = email
             st.success("✅ Candidate data loaded successfully!")
@@ -131,73 +363,80 @@ if not st.session_state.get("qa_started", False):
     st.info("📎 Please retrieve a candidate by email to start the interview.")
 
 if st.session_state.get("qa_started", False):
-    if st.session_state.question_count == 0:
-        with st.spinner("Generating first question..."):
-            try:
-                parsed_resume_str = json.dumps(st.session_state.parsed_resume)
-                qres = requests.post(
-                    "http://127.0.0.1:8000/generate-question/",
-                    json={"parsed_resume": parsed_resume_str}
-                )
-                if qres.status_code == 200:
-                    st.session_state.last_question = qres.json()["question"]
-                    st.session_state.question_count += 1
-                    st.session_state.new_question_ready = True
-                    st.session_state.audio_trigger = True
-                    st.rerun()
-                else:
-                    st.error(f"❌ Failed to generate first question: {qres.text}")
-            except Exception as e:
-                st.error(f"❌ Error generating question: {str(e)}")
+    # Show current question; audio is filled at the end of the run,
+    # once the rest of the page is on screen
+    question_slot = st.empty()
+    audio_slot = st.empty()
+    if st.session_state.question_count > 0:
+        render_question(question_slot, st.session_state.question_count, st.session_state.last_question)
 
-    # Show current question
-    st.subheader(f"🤖 Question {st.session_state.question_count}")
-    st.write(st.session_state.last_question)
-
-    if st.session_state.audio_trigger:
+    opening = st.session_state.opening_question
+    if st.session_state.question_count == 0 and opening:
+        # Generated and spoken ahead of time, shown without any LLM or TTS wait
+        st.session_state.last_question = opening["question"]
+        st.session_state.question_audio = ready_clip(opening["audio"], audio_mime_type(opening["audio_format"]))
+        st.session_state.audio_trigger = True
+        st.session_state.question_count = 1
+        st.session_state.new_question_ready = True
+        render_question(question_slot, 1, opening["question"])
+    elif st.session_state.question_count == 0:
         try:
-            audio_bytes = text_to_speech(st.session_state.last_question)
-            b64_audio = base64.b64encode(audio_bytes).decode()
-            audio_html = f"""
-            <audio autoplay style="display:none;">
-                <source src="data:audio/wav;base64,{b64_audio}" type="audio/wav">
-            </audio>
-            """
-            st.components.v1.html(audio_html, height=0)
-            st.session_state.audio_trigger = False
+            with st.spinner("Generating first question..."):
+                question = request_question("/generate-question/", {}, 1, question_slot, audio_slot)
+            st.session_state.question_count += 1
+            st.session_state.new_question_ready = True
+            if STREAM_QUESTIONS:
+                st.session_state.last_question = question
+            else:
+                set_question(question)
+                st.rerun()
         except Exception as e:
-            st.warning(f"⚠️ Failed to speak question: {e}")
+            st.error(f"❌ Error generating question: {str(e)}")
 
     # Answer section
     st.markdown("---")
     st.subheader("🎤 Your Answer")
-    audio = mic_recorder(
-        start_prompt="Click to start recording",
-        stop_prompt="Click to stop",
-        just_once=True,
-        use_container_width=True
-    )
+    transcript = None
+    if STREAMING_TRANSCRIPTION:
+        try:
+            transcript = stream_answer()
+        except Exception as e:
+            st.error(f"❌ Error transcribing answer: {str(e)}")
+    else:
+        audio = mic_recorder(
+            start_prompt="Click to start recording",
+            stop_prompt="Click to stop",
+            just_once=True,
+            use_container_width=True
+        )
+        if audio:
+            with st.spinner("Transcribing your answer..."):
+                try:
+                    transcript = VT.convert_and_transcribe(audio["bytes"])
+                except Exception as e:
+                    st.error(f"❌ Error transcribing answer: {str(e)}")
 
-    if audio:
+    if transcript is not None and not transcript.strip():
+        st.warning("No speech was detected, please record your answer again.")
+    elif transcript is not None:
         with st.spinner("Processing your answer..."):
             try:
-                transcript = VT.convert_and_transcribe(audio["bytes"])
                 st.write(f"**You said:** {transcript}")
                 
-                parsed_resume_str = json.dumps(st.session_state.parsed_resume)
-                qres = requests.post(
-                    "http://127.0.0.1:8000/next-question/",
-                    json={
-                        "parsed_resume": parsed_resume_str,
-                        "last_answer": transcript
-                    }
+                # Only the new answer is sent, the backend keeps resume and history
+                question = request_question(
+                    "/next-question/", {"last_answer": transcript},
+                    st.session_state.question_count + 1, question_slot, audio_slot
                 )
-                if qres.status_code == 200:
-                    st.session_state.last_question = qres.json()["question"]
-                    st.session_state.question_count += 1
-                    st.session_state.audio_trigger = True
-                    st.rerun()
+                st.session_state.question_count += 1
+                if STREAM_QUESTIONS:
+                    st.session_state.last_question = question
                 else:
-                    st.error(f"❌ Failed to generate next question: {qres.text}")
+                    set_question(question)
+                    st.rerun()
             except Exception as e:
-                st.error(f"❌ Error processing answer: {str(e)}")
\ No newline at end of file
+                st.error(f"❌ Error processing answer: {str(e)}")
+
+    # Attach the question audio last so it never holds up rendering
+    if st.session_state.audio_trigger:
+        play_question_audio(audio_slot)
\ No newline at end of file
@@ -1,34 +1,31 @@
-from db_utils import AdminUser, SessionLocal, create_admin_user
+from db_utils import AdminUser, session_scope, create_admin_user
 from werkzeug.security import check_password_hash
 import streamlit as st
 import datetime
 
 def authenticate(username: str, password: str) -> bool:
-    db = SessionLocal()
     try:
-        admin = db.query(AdminUser).filter(
-            AdminUser.username == username,
-            AdminUser.is_active == True
-        ).first()
-        
-        if admin and check_password_hash(admin.password_hash, password):
-            st.session_state["admin"] = {
-                "username": admin.username,
-                "full_name": admin.full_name,
-                "api_key": admin.api_key
-            }
-            st.session_state["authenticated"] = True
-            st.session_state["admin"]["authenticated"] = True
-            
-            admin.last_login = datetime.datetime.utcnow()
-            db.commit()
-            return True
-        return False
+        with session_scope() as db:
+            admin = db.query(AdminUser).filter(
+                AdminUser.username == username,
+                AdminUser.is_active == True
+            ).first()
+
+            if admin and check_password_hash(admin.password_hash, password):
+                st.session_state["admin"] = {
+                    "username": admin.username,
+                    "full_name": admin.full_name,
+                    "api_key": admin.api_key
+                }
+                st.session_state["authenticated"] = True
+                st.session_state["admin"]["authenticated"] = True
+
+                admin.last_login = datetime.datetime.utcnow()
+                return True
+            return False
     except Exception as e:
         st.error(f"Authentication error: {str(e)}")
         return False
-    finally:
-        db.close()
 
 def registration_form():
     with st.form("Registration Form"):
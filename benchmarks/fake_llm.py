@@ -0,0 +1,164 @@
+"""OpenAI/Groq-compatible chat completions stand-in for offline benchmarks.
+
+    python -m benchmarks.fake_llm --port 8090 --latency-ms 300 --jitter-ms 50
+
+Point the backend at it with GROQ_BASE_URL=http://127.0.0.1:8090 (any
+GROQ_API_KEY works). Resume parse prompts get a JSON resume built from the
+resume text, every other prompt gets a canned interview question.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+# Seconds; updated by configure() or the command line
+settings = {"latency": 0.3, "jitter": 0.05, "token_delay": 0.01}
+
+CANNED_QUESTIONS = [
+    "Can you walk me through the most challenging project on your resume?",
+    "How did you decide on the architecture for that system, and what would you change today?",
+    "Tell me about a time you had to debug a production issue under pressure.",
+    "Which of the skills you listed have you used most recently, and in what context?",
+    "How do you make sure the code you ship is well tested and maintainable?",
+    "Describe a disagreement with a teammate and how you resolved it.",
+]
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+SKILLS_LINE = re.compile(r"^Skills:?\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+NAME_LINE = re.compile(r"Resume:\s*\n\s*(.+)")
+
+app = FastAPI()
+
+
+def configure(latency_ms=None, jitter_ms=None, token_ms=None):
+    if latency_ms is not None:
+        settings["latency"] = latency_ms / 1000
+    if jitter_ms is not None:
+        settings["jitter"] = jitter_ms / 1000
+    if token_ms is not None:
+        settings["token_delay"] = token_ms / 1000
+
+
+def canned_resume(prompt: str) -> str:
+    email = EMAIL_PATTERN.search(prompt)
+    skills = SKILLS_LINE.search(prompt)
+    name = NAME_LINE.search(prompt)
+    return json.dumps({
+        "Full Name": name.group(1).strip() if name else "Sam Candidate",
+        "Email Address": email.group(0) if email else "candidate@example.com",
+        "Phone Number": "+1 555 0100",
+        "Skills": [s.strip() for s in skills.group(1).split(",")] if skills else ["Python", "SQL"],
+        "Education": [{"degree": "BSc Computer Science", "institution": "State University", "year": "2018"}],
+        "Work Experience": [{
+            "title": "Software Engineer",
+            "company": "Example Corp",
+            "duration": "2019 - present",
+            "description": "Built data pipelines and internal APIs.",
+        }],
+        "Projects": [{"name": "Interview scheduler", "description": "Scheduling service used by 40 teams."}],
+    }, indent=2)
+
+
+def completion_text(prompt: str) -> str:
+    if "resume parser" in prompt:
+        return canned_resume(prompt)
+    return random.choice(CANNED_QUESTIONS)
+
+
+def _estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+async def _wait():
+    await asyncio.sleep(max(0.0, random.gauss(settings["latency"], settings["jitter"])))
+
+
+def _completion(model, text, prompt_tokens):
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": _estimate_tokens(text),
+            "total_tokens": prompt_tokens + _estimate_tokens(text),
+        },
+    }
+
+
+def _chunk(completion_id, model, content=None, finish_reason=None):
+    delta = {"content": content} if content is not None else {}
+    return "data: " + json.dumps({
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }) + "\n\n"
+
+
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake-model")
+    prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+    text = completion_text(prompt)
+
+    if not body.get("stream"):
+        await _wait()
+        return _completion(model, text, _estimate_tokens(prompt))
+
+    async def events():
+        # Latency applies to the first token, then tokens trickle in
+        await _wait()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        for word in re.findall(r"\S+\s*", text):
+            yield _chunk(completion_id, model, word)
+            await asyncio.sleep(settings["token_delay"])
+        yield _chunk(completion_id, model, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def serve_in_thread(app_to_serve, port, host="127.0.0.1"):
+    """Run an ASGI app with uvicorn on a daemon thread, returns once it accepts connections."""
+    server = uvicorn.Server(uvicorn.Config(app_to_serve, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Server on port {port} failed to start")
+        time.sleep(0.05)
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Groq/OpenAI chat completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=300, help="Mean time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=50, help="Standard deviation of the latency")
+    parser.add_argument("--token-ms", type=float, default=10, help="Delay between streamed tokens")
+    args = parser.parse_args(argv)
+
+    configure(args.latency_ms, args.jitter_ms, args.token_ms)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Synthetic resumes and pre-recorded answer clips for the benchmarks.
+
+Files are generated once into the fixtures directory and reused, so every
+run (and every version being compared) measures the same inputs.
+"""
+import os
+import random
+import subprocess
+
+FIRST_NAMES = ["Aisha", "Ben", "Carlos", "Dana", "Elif", "Farid", "Grace", "Hiro", "Ines", "Jonas", "Kavya", "Luca"]
+LAST_NAMES = ["Khan", "Okafor", "Silva", "Novak", "Yilmaz", "Haddad", "Lee", "Tanaka", "Moreau", "Berg", "Rao", "Conti"]
+POSITIONS = ["Data Engineer", "Backend Developer", "ML Engineer", "Frontend Developer"]
+SKILLS = [
+    "Python", "SQL", "PostgreSQL", "Kafka", "Spark", "Airflow", "Docker", "Kubernetes", "AWS", "GCP",
+    "React", "TypeScript", "FastAPI", "Django", "PyTorch", "TensorFlow", "Terraform", "Redis", "Go", "Java",
+]
+
+ANSWERS = [
+    "In my last role I rebuilt our ingestion pipeline so that late events were handled correctly.",
+    "I usually start by reproducing the issue locally and then narrow it down with logging and metrics.",
+    "We chose PostgreSQL because the data was relational and we needed strong consistency.",
+    "I wrote unit tests for the parsing logic and an integration test against a staging database.",
+    "The hardest part was coordinating the migration with three other teams without downtime.",
+    "I would split the service into smaller workers and put a queue between them next time.",
+]
+
+RESUME_FORMATS = ("pdf", "docx", "txt")
+
+
+def resume_text(index: int, rng: random.Random) -> str:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    skills = rng.sample(SKILLS, 8)
+    jobs = []
+    for year in range(2023, 2023 - rng.randint(2, 5), -1):
+        jobs.append(
+            f"{rng.choice(POSITIONS)}, Company {rng.randint(1, 99)} ({year - 1} - {year})\n"
+            f"- Delivered {rng.choice(skills)} services handling {rng.randint(1, 50)}k requests per day\n"
+            f"- Led migration from {rng.choice(skills)} to {rng.choice(skills)}\n"
+            f"- Mentored {rng.randint(1, 6)} engineers and ran weekly design reviews"
+        )
+    return "\n".join([
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}.{index}@example.com",
+        f"+1 555 {index:04d}",
+        "",
+        f"Position: {rng.choice(POSITIONS)}",
+        f"Skills: {', '.join(skills)}",
+        "",
+        "Work Experience",
+        *jobs,
+        "",
+        "Education",
+        f"BSc Computer Science, University {rng.randint(1, 20)}, {rng.randint(2008, 2020)}",
+        "",
+        "Projects",
+        f"- Open source contributor to a {rng.choice(skills)} library",
+        f"- Built an internal dashboard with {rng.choice(skills)}",
+    ])
+
+
+def _write_pdf(path, text):
+    import fitz
+    with fitz.open() as doc:
+        lines = text.splitlines()
+        # Roughly one page per 50 lines, like a real resume
+        for start in range(0, len(lines), 50):
+            page = doc.new_page()
+            page.insert_textbox(page.rect + (50, 50, -50, -50), "\n".join(lines[start:start + 50]), fontsize=10)
+        doc.save(path)
+
+
+def _write_docx(path, text):
+    from docx import Document
+    doc = Document()
+    for line in text.splitlines():
+        doc.add_paragraph(line)
+    doc.save(path)
+
+
+def resume_files(directory: str, count: int, seed: int = 0):
+    """Paths of ``count`` resumes cycling through PDF, DOCX and TXT."""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for index in range(count):
+        text = resume_text(index, rng)
+        fmt = RESUME_FORMATS[index % len(RESUME_FORMATS)]
+        path = os.path.join(directory, f"resume_{seed}_{index:04d}.{fmt}")
+        if not os.path.exists(path):
+            if fmt == "pdf":
+                _write_pdf(path, text)
+            elif fmt == "docx":
+                _write_docx(path, text)
+            else:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(text)
+        paths.append(path)
+    return paths
+
+
+def _spoken_wav(text):
+    from tts_engine import text_to_speech
+    return text_to_speech(text)
+
+
+def _to_webm(path, wav_bytes=None, seconds=6):
+    # Same container and codec as browser MediaRecorder output
+    if wav_bytes is not None:
+        source = ["-f", "wav", "-i", "pipe:0"]
+    else:
+        # No TTS voice available: speech-band noise of a typical answer length
+        source = ["-f", "lavfi", "-i", f"anoisesrc=color=pink:duration={seconds}:amplitude=0.2"]
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", *source, "-ac", "1", "-ar", "48000", "-c:a", "libopus", "-b:a", "32k", path],
+        input=wav_bytes, check=True
+    )
+
+
+def answer_clips(directory: str, count: int):
+    """Paths of ``count`` webm/opus answer clips, spoken with the local TTS voice when available."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"answer_{index:03d}.webm")
+        if not os.path.exists(path):
+            try:
+                wav_bytes = _spoken_wav(ANSWERS[index % len(ANSWERS)])
+            except Exception:
+                wav_bytes = None
+            _to_webm(path, wav_bytes)
+        paths.append(path)
+    return paths
+
+
+def read_all(paths):
+    data = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            data[path] = f.read()
+    return data
@@ -0,0 +1,397 @@
+"""Offline end-to-end benchmark of the interview pipeline.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --output new.json --compare results.json
+
+Runs with no network access. LLM calls go to a fake Groq-compatible server
+(benchmarks.fake_llm) and the database is a scratch SQLite file. Inputs are
+synthetic PDF/DOCX/TXT resumes and pre-recorded webm answer clips
+(benchmarks.fixtures). The Whisper model for --whisper-model must already be
+in the local cache.
+
+Each stage runs in a fresh process so its peak RSS is its own:
+
+    extract     Data_Extractor on every resume format
+    transcribe  ffmpeg decode + Whisper per answer clip
+    tts         text_to_speech, cold and cached
+    db          db_utils saves, candidate lookups and searches on SQLite
+    backend     FastAPI endpoints over HTTP against the fake provider
+    turns       N concurrent interviews, each turn transcribe -> /next-question/ -> TTS
+
+Results are JSON: latency percentiles per metric (ms), peak RSS per stage
+(MB) and turn throughput. --compare prints the p50/p95 change against an
+earlier results file and, with --fail-on-regression, exits non-zero past
+--threshold percent.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+STAGES = ["extract", "transcribe", "tts", "db", "backend", "turns"]
+PERCENTILES = (50, 90, 95, 99)
+
+
+class Recorder:
+    """Latency samples in seconds, keyed by metric name."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, metric, seconds):
+        self.samples.setdefault(metric, []).append(seconds)
+
+    def time(self, metric, fn, *args, **kwargs):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.add(metric, time.perf_counter() - started)
+        return result
+
+
+def percentile(sorted_values, p):
+    # Nearest rank
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarise(values):
+    values = sorted(values)
+    summary = {"count": len(values), "mean_ms": round(sum(values) / len(values) * 1000, 3)}
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = round(percentile(values, p) * 1000, 3)
+    summary["max_ms"] = round(values[-1] * 1000, 3)
+    return summary
+
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_servers(opts):
+    """Fake provider and the real backend on local ports, returns the backend URL."""
+    from benchmarks import fake_llm
+
+    fake_llm.configure(opts["llm_latency_ms"], opts["llm_jitter_ms"], opts["llm_token_ms"])
+    llm_port = free_port()
+    fake_llm.serve_in_thread(fake_llm.app, llm_port)
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{llm_port}"
+
+    import multimodel_backend
+    backend_port = free_port()
+    fake_llm.serve_in_thread(multimodel_backend.app, backend_port)
+    return f"http://127.0.0.1:{backend_port}"
+
+
+def seed_database(resume_texts, rec=None):
+    """Fresh schema with one candidate per resume, returns their emails."""
+    import db_migrate
+    from benchmarks.fake_llm import canned_resume
+    from db_utils import save_parsed_resume
+
+    db_migrate.init()
+    emails = []
+    for index, text in enumerate(resume_texts):
+        parsed = json.loads(canned_resume(f"resume parser\nResume:\n{text}"))
+        email = parsed["Email Address"]
+        started = time.perf_counter()
+        save_parsed_resume({
+            "contact_info": {
+                "name": parsed["Full Name"],
+                "email": email,
+                "phone": parsed["Phone Number"],
+                "position": "Data Engineer" if index % 2 else "Backend Developer",
+                "processed_by": "benchmark",
+            },
+            "parsed_resume": {"result": json.dumps(parsed)},
+            "raw_text": text,
+        }, primary_key=email)
+        if rec is not None:
+            rec.add("save_parsed_resume", time.perf_counter() - started)
+        emails.append(email)
+    return emails
+
+
+def resume_texts(opts):
+    from benchmarks import fixtures
+    rng = random.Random(opts["seed"])
+    return [fixtures.resume_text(i, rng) for i in range(opts["resumes"])]
+
+
+def stage_extract(opts, rec):
+    from benchmarks import fixtures
+    from Resume_Data_Extractor import Data_Extractor as DE
+
+    files = fixtures.read_all(fixtures.resume_files(opts["fixtures"], opts["resumes"], opts["seed"]))
+    for _ in range(opts["repeat"]):
+        for path, data in files.items():
+            fmt = os.path.splitext(path)[1].lstrip(".")
+            rec.time(f"extract_{fmt}", DE.extract_bytes, os.path.basename(path), data)
+    return {"files": len(files)}
+
+
+def stage_transcribe(opts, rec):
+    from benchmarks import fixtures
+    from Voice_transcriber import Voice_Transcriber as VT, decode_audio, get_model
+
+    clips = fixtures.read_all(fixtures.answer_clips(os.path.join(opts["fixtures"], "clips"), opts["clips"]))
+    model = rec.time("whisper_load", get_model, opts["whisper_model"])
+    for _ in range(opts["repeat"]):
+        for data in clips.values():
+            audio = rec.time("ffmpeg_decode", decode_audio, data)
+            rec.time("whisper_transcribe", model.transcribe, audio)
+            rec.time("convert_and_transcribe", VT.convert_and_transcribe, data, opts["whisper_model"])
+    return {"clips": len(clips), "model": opts["whisper_model"]}
+
+
+def stage_tts(opts, rec):
+    from benchmarks.fake_llm import CANNED_QUESTIONS
+    from tts_engine import DEFAULT_FORMAT, cache_stats, text_to_speech
+
+    sizes = []
+    for i in range(opts["repeat"]):
+        for question in CANNED_QUESTIONS:
+            # Unique text so every call synthesises
+            audio = rec.time("tts_cold", text_to_speech, f"{question} ({i})", output_format=DEFAULT_FORMAT)
+            sizes.append(len(audio))
+            rec.time("tts_cached", text_to_speech, f"{question} ({i})", output_format=DEFAULT_FORMAT)
+    return {"format": DEFAULT_FORMAT, "mean_clip_bytes": sum(sizes) // len(sizes), "cache": cache_stats()}
+
+
+def stage_db(opts, rec):
+    from db_utils import get_interview_candidate, pool_stats, search_candidates
+
+    emails = seed_database(resume_texts(opts), rec)
+    for _ in range(opts["repeat"]):
+        for email in emails:
+            rec.time("get_interview_candidate", get_interview_candidate, email)
+        rec.time("search_first_page", search_candidates, limit=20)
+        rec.time("search_position", search_candidates, position="Data Engineer", limit=20)
+        rec.time("search_prefix", search_candidates, prefix=emails[0][:3], limit=20)
+        rec.time("search_skills", search_candidates, skills="python kafka", limit=20)
+    return {"candidates": len(emails), "pool": pool_stats()}
+
+
+def stage_backend(opts, rec):
+    import requests
+
+    texts = resume_texts(opts)
+    emails = seed_database(texts)
+    base = start_servers(opts)
+    http = requests.Session()
+
+    def post(path, payload=None):
+        response = http.post(f"{base}{path}", json=payload, timeout=60)
+        response.raise_for_status()
+        return response.json()
+
+    for text in texts:
+        parsed = rec.time("parse_resume", post, "/parse-resume/", {"resume_text": text})["result"]
+        rec.time("parse_resume_cached", post, "/parse-resume/", {"resume_text": text})
+        rec.time("generate_question", post, "/generate-question/", {"parsed_resume": parsed})
+        rec.time("next_question", post, "/next-question/", {"parsed_resume": parsed, "last_answer": "I built APIs."})
+
+    for email in emails:
+        session_id = rec.time("create_session", post, "/sessions/", {"email": email})["session_id"]
+        rec.time("session_first_question", post, f"/sessions/{session_id}/generate-question/")
+        for _ in range(opts["turns"]):
+            rec.time("session_next_question", post, f"/sessions/{session_id}/next-question/",
+                     {"last_answer": "We moved the pipeline to Kafka."})
+
+        # Time to first token and total for the streaming variant
+        started = time.perf_counter()
+        with http.post(f"{base}/sessions/{session_id}/next-question/stream",
+                       json={"last_answer": "Mostly Python."}, stream=True, timeout=60) as response:
+            first = True
+            for line in response.iter_lines():
+                if line and first:
+                    rec.add("stream_first_token", time.perf_counter() - started)
+                    first = False
+        rec.add("stream_total", time.perf_counter() - started)
+        http.delete(f"{base}/sessions/{session_id}", timeout=10)
+
+    return {"usage": http.get(f"{base}/usage", timeout=10).json()}
+
+
+def stage_turns(opts, rec):
+    import requests
+    from benchmarks import fixtures
+    from tts_engine import DEFAULT_FORMAT, text_to_speech
+    from Voice_transcriber import Voice_Transcriber as VT, get_model
+
+    clips = list(fixtures.read_all(fixtures.answer_clips(os.path.join(opts["fixtures"], "clips"), opts["clips"])).values())
+    emails = seed_database(resume_texts(opts))
+    base = start_servers(opts)
+    get_model(opts["whisper_model"])
+
+    def interview(index):
+        http = requests.Session()
+        email = emails[index % len(emails)]
+        session_id = http.post(f"{base}/sessions/", json={"email": email}, timeout=60).json()["session_id"]
+        http.post(f"{base}/sessions/{session_id}/generate-question/", timeout=60).raise_for_status()
+        for turn in range(opts["turns"]):
+            started = time.perf_counter()
+            answer = rec.time("turn_transcribe", VT.convert_and_transcribe, clips[(index + turn) % len(clips)],
+                              opts["whisper_model"])
+            response = rec.time("turn_next_question", http.post, f"{base}/sessions/{session_id}/next-question/",
+                                json={"last_answer": answer or "(no answer)"}, timeout=60)
+            response.raise_for_status()
+            rec.time("turn_tts", text_to_speech, response.json()["question"], output_format=DEFAULT_FORMAT)
+            rec.add("turn_total", time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=opts["interviews"]) as pool:
+        list(pool.map(interview, range(opts["interviews"])))
+    elapsed = time.perf_counter() - started
+    turns = opts["interviews"] * opts["turns"]
+    return {
+        "concurrent_interviews": opts["interviews"],
+        "turns": turns,
+        "seconds": round(elapsed, 3),
+        "turns_per_sec": round(turns / elapsed, 3),
+    }
+
+
+STAGE_FUNCTIONS = {
+    "extract": stage_extract,
+    "transcribe": stage_transcribe,
+    "tts": stage_tts,
+    "db": stage_db,
+    "backend": stage_backend,
+    "turns": stage_turns,
+}
+
+
+def run_stage(name, opts):
+    """Runs in a fresh worker process."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(opts['workdir'], name + '.db')}"
+    db_path = os.environ["DATABASE_URL"][len("sqlite:///"):]
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    rec = Recorder()
+    started = time.perf_counter()
+    extra = STAGE_FUNCTIONS[name](opts, rec)
+    return {
+        "seconds": round(time.perf_counter() - started, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "metrics": {metric: summarise(values) for metric, values in rec.samples.items()},
+        "extra": extra,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(old, new, threshold):
+    """Print p50/p95 changes per metric, returns the metrics slower than threshold percent."""
+    regressions = []
+    for stage, result in new["stages"].items():
+        previous = old.get("stages", {}).get(stage)
+        if not previous or "metrics" not in result or "metrics" not in previous:
+            continue
+        for metric, summary in result["metrics"].items():
+            before = previous["metrics"].get(metric)
+            if not before:
+                continue
+            changes = []
+            for key in ("p50_ms", "p95_ms"):
+                change = (summary[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+                changes.append(f"{key} {before[key]:.1f} -> {summary[key]:.1f} ({change:+.1f}%)")
+                if change > threshold:
+                    regressions.append(f"{stage}.{metric}.{key}")
+            print(f"{stage}.{metric}: " + ", ".join(changes))
+        print(f"{stage}.peak_rss_mb: {previous['peak_rss_mb']} -> {result['peak_rss_mb']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline interview pipeline benchmark.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--resumes", type=int, default=12, help="Synthetic resumes (PDF/DOCX/TXT in turn)")
+    parser.add_argument("--clips", type=int, default=6, help="Pre-recorded answer clips")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the inputs per stage")
+    parser.add_argument("--interviews", type=int, default=4, help="Concurrent simulated interviews")
+    parser.add_argument("--turns", type=int, default=3, help="Answer turns per interview")
+    parser.add_argument("--whisper-model", default=os.getenv("WHISPER_MODEL", "tiny"))
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50)
+    parser.add_argument("--llm-token-ms", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", default=os.path.join(tempfile.gettempdir(), "ai_interviewer_bench"),
+                        help="Where generated resumes and clips are kept between runs")
+    parser.add_argument("--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    # Offline: the fake provider stands in for Groq, transcription stays in process
+    os.environ.pop("TRANSCRIBE_SERVICE_URL", None)
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+    opts = {key: value for key, value in vars(args).items() if key not in ("output", "compare", "stages")}
+    opts["workdir"] = tempfile.mkdtemp(prefix="ai_interviewer_bench_")
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "options": opts,
+        },
+        "stages": {},
+    }
+    for name in args.stages:
+        print(f"Running {name}...", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            try:
+                results["stages"][name] = pool.submit(run_stage, name, opts).result()
+            except Exception as e:
+                results["stages"][name] = {"error": f"{type(e).__name__}: {e}"}
+                print(f"  {name} failed: {e}", file=sys.stderr)
+
+    output = json.dumps(results, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        if regressions:
+            print(f"Regressions over {args.threshold}%: {', '.join(regressions)}", file=sys.stderr)
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""Bulk resume ingestion.
+
+Extracts text from many PDF/DOCX/TXT files (directories and zip archives
+included) in a process pool, parses them through the backend with bounded
+concurrency and upserts the results in batches.
+
+    python bulk_ingest.py resumes/ more_resumes.zip --position "Data Engineer" --report report.json
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import requests
+
+from Resume_Data_Extractor import MAX_BYTES, Data_Extractor as DE
+from prompt_context import canonical_fields, unwrap_resume
+import opening_questions
+
+BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+
+
+
+def collect_files(paths):
+    """Yield (name, bytes) for every supported file under paths, unpacking zips."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    yield from collect_files([os.path.join(root, name)])
+        elif path.lower().endswith(".zip"):
+            with open(path, "rb") as f:
+                yield from iter_zip(path, f.read())
+        elif path.lower().endswith(SUPPORTED_EXTENSIONS):
+            with open(path, "rb") as f:
+                yield path, f.read()
+
+
+def iter_zip(label, data):
+    """Yield (name, bytes) for supported members; bytes is None for members over MAX_BYTES."""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and info.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                name = f"{label}:{info.filename}"
+                # Checked before decompressing, a small archive can expand to gigabytes
+                if info.file_size > MAX_BYTES:
+                    yield name, None
+                else:
+                    yield name, archive.read(info)
+
+
+def extract_file(name, data):
+    # Runs in a worker process, so no page-level parallelism here
+    if data is None:
+        return name, None, f"File is larger than {MAX_BYTES // (1024 * 1024)} MB"
+    try:
+        text = DE.extract_bytes(os.path.basename(name), data, workers=1)
+        if not text:
+            return name, None, "No text could be extracted"
+        return name, text, None
+    except Exception as e:
+        return name, None, f"Extraction failed: {e}"
+
+
+def contact_fields(parsed, text):
+    """Name, email and phone from the parsed resume, email falling back to the raw text."""
+    resume = unwrap_resume(parsed)
+    found = canonical_fields(resume) if isinstance(resume, dict) else {}
+    contact = {
+        field: str(found.get(name) or "").strip()
+        for field, name in (("name", "full_name"), ("email", "email"), ("phone", "phone"))
+    }
+    if not EMAIL_PATTERN.fullmatch(contact["email"]):
+        match = EMAIL_PATTERN.search(text)
+        contact["email"] = match.group(0).lower() if match else ""
+    return contact
+
+
+def parse_text(text, session):
+    response = session.post(
+        f"{BACKEND_URL}/parse-resume/", json={"resume_text": text, "structured": True}, timeout=120
+    )
+    if response.status_code != 200:
+        raise RuntimeError(f"API Error: {response.status_code} - {response.text}")
+    return response.json()["result"]
+
+
+def ingest(files, position="", processed_by="bulk_ingest", workers=None,
+           concurrency=8, batch_size=50, progress=None):
+    """Run the whole pipeline over (name, bytes) pairs.
+
+    Returns a per-file report and a summary with throughput in resumes/sec.
+    """
+    from db_utils import resume_row, upsert_resumes
+
+    files = list(files)
+    started = time.perf_counter()
+    report = {name: {"file": name, "status": "failed", "email": "", "error": ""} for name, _ in files}
+    pending_rows, pending_names = [], []
+
+    def flush():
+        if not pending_rows:
+            return
+        try:
+            upsert_resumes(pending_rows)
+            for name in pending_names:
+                report[name]["status"] = "saved"
+            for row in pending_rows:
+                opening_questions.schedule(row["email"], row["parsed_data"])
+        except Exception as e:
+            for name in pending_names:
+                report[name]["error"] = f"Database error: {e}"
+        pending_rows.clear()
+        pending_names.clear()
+
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as extractors, \
+            ThreadPoolExecutor(max_workers=concurrency) as parsers, \
+            requests.Session() as session:
+        extractions = [extractors.submit(extract_file, name, data) for name, data in files]
+        parses = {}
+        for future in as_completed(extractions):
+            name, text, error = future.result()
+            if error:
+                report[name]["error"] = error
+                done += 1
+                if progress:
+                    progress(done, len(files))
+                continue
+            parses[parsers.submit(parse_text, text, session)] = (name, text)
+
+        for future in as_completed(parses):
+            name, text = parses[future]
+            done += 1
+            try:
+                parsed = future.result()
+                contact = contact_fields(parsed, text)
+                if not contact["email"]:
+                    raise ValueError("No email address found in resume")
+                report[name]["email"] = contact["email"]
+                pending_rows.append(resume_row({
+                    "contact_info": {
+                        **contact,
+                        "name": contact["name"] or contact["email"],
+                        "position": position,
+                        "processed_by": processed_by
+                    },
+                    "parsed_resume": parsed,
+                    "raw_text": text
+                }, contact["email"]))
+                pending_names.append(name)
+                if len(pending_rows) >= batch_size:
+                    flush()
+            except Exception as e:
+                report[name]["error"] = str(e)
+            if progress:
+                progress(done, len(files))
+        flush()
+
+    elapsed = time.perf_counter() - started
+    saved = sum(1 for row in report.values() if row["status"] == "saved")
+    summary = {
+        "files": len(files),
+        "saved": saved,
+        "failed": len(files) - saved,
+        "seconds": round(elapsed, 3),
+        "resumes_per_sec": round(saved / elapsed, 3) if elapsed else 0.0,
+    }
+    return list(report.values()), summary
+
+
+def write_report(path, report, summary):
+    if path.lower().endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["file", "status", "email", "error"])
+            writer.writeheader()
+            writer.writerows(report)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "files": report}, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest resumes from files, directories and zip archives.")
+    parser.add_argument("paths", nargs="+", help="Resume files, directories or .zip archives")
+    parser.add_argument("--position", default="", help="Position applied for, stored on every resume")
+    parser.add_argument("--processed-by", default="bulk_ingest")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel parse requests")
+    parser.add_argument("--batch-size", type=int, default=50, help="Rows per database transaction")
+    parser.add_argument("--report", help="Write the per-file report to this .json or .csv file")
+    args = parser.parse_args(argv)
+
+    report, summary = ingest(
+        collect_files(args.paths),
+        position=args.position,
+        processed_by=args.processed_by,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        progress=lambda done, total: print(f"\r{done}/{total}", end="", flush=True)
+    )
+    print()
+    if opening_questions.ENABLED and summary["saved"]:
+        print("Waiting for opening questions to be generated...")
+        opening_questions.wait()
+    for row in report:
+        if row["status"] != "saved":
+            print(f"FAILED {row['file']}: {row['error']}")
+    print(
+        f"Saved {summary['saved']}/{summary['files']} resumes in {summary['seconds']}s "
+        f"({summary['resumes_per_sec']} resumes/sec)"
+    )
+    if args.report:
+        write_report(args.report, report, summary)
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
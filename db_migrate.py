@@ -0,0 +1,297 @@
+"""Database bootstrap and schema migrations.
+
+Run once per deploy instead of on every import:
+
+    python db_migrate.py init      # empty database: create all tables at the latest version
+    python db_migrate.py upgrade   # existing database (including pre-migration ones): apply pending migrations
+    python db_migrate.py status
+"""
+import argparse
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, String, MetaData, Table, inspect, select, text
+
+from db_utils import Base, OpeningQuestion, get_engine, normalise_parsed_resume, skills_text
+
+_metadata = MetaData()
+schema_version = Table(
+    "schema_version", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200)),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+
+def _baseline(conn):
+    Base.metadata.create_all(bind=conn)
+
+
+def _split_resume_payload(conn):
+    # Move the parsed resume out of full_data (which also duplicated raw_text)
+    # into its own JSON/JSONB column, then drop full_data
+    if "full_data" not in {c["name"] for c in inspect(conn).get_columns("resumes")}:
+        return  # created by the baseline step with the current model
+    json_type = "JSONB" if conn.dialect.name == "postgresql" else "JSON"
+    conn.execute(text(f"ALTER TABLE resumes ADD COLUMN parsed_data {json_type}"))
+    conn.execute(text("ALTER TABLE resumes ADD COLUMN processed_by VARCHAR(50)"))
+
+    rows = conn.execute(text("SELECT email, full_data FROM resumes")).mappings().all()
+    for row in rows:
+        full_data = row["full_data"]
+        if isinstance(full_data, str):
+            full_data = json.loads(full_data)
+        full_data = full_data or {}
+        conn.execute(
+            text("UPDATE resumes SET parsed_data = :parsed, processed_by = :processed_by WHERE email = :email"),
+            {
+                "parsed": json.dumps(normalise_parsed_resume(full_data.get("parsed_resume"))),
+                "processed_by": (full_data.get("contact_info") or {}).get("processed_by"),
+                "email": row["email"],
+            }
+        )
+    conn.execute(text("ALTER TABLE resumes DROP COLUMN full_data"))
+
+
+# Candidate listing/search indexes, see db_utils.search_candidates
+SEARCH_INDEXES = {
+    "postgresql": [
+        "CREATE INDEX IF NOT EXISTS ix_resumes_created ON resumes (created_at DESC, email DESC)",
+        "CREATE INDEX IF NOT EXISTS ix_resumes_position_created ON resumes (position, created_at DESC, email DESC)",
+        "CREATE INDEX IF NOT EXISTS ix_resumes_email_prefix ON resumes (lower(email) text_pattern_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_resumes_name_prefix ON resumes (lower(name) text_pattern_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_resumes_skills_fts ON resumes "
+        "USING gin (to_tsvector('simple'::regconfig, coalesce(skills, '')))",
+    ],
+    "sqlite": [
+        "CREATE INDEX IF NOT EXISTS ix_resumes_created ON resumes (created_at DESC, email DESC)",
+        "CREATE INDEX IF NOT EXISTS ix_resumes_position_created ON resumes (position, created_at DESC, email DESC)",
+        "CREATE INDEX IF NOT EXISTS ix_resumes_email_prefix ON resumes (lower(email))",
+        "CREATE INDEX IF NOT EXISTS ix_resumes_name_prefix ON resumes (lower(name))",
+    ],
+}
+
+
+def _create_search_indexes(conn):
+    for statement in SEARCH_INDEXES.get(conn.dialect.name, []):
+        conn.execute(text(statement))
+
+
+def _candidate_search(conn):
+    if "skills" not in {c["name"] for c in inspect(conn).get_columns("resumes")}:
+        conn.execute(text("ALTER TABLE resumes ADD COLUMN skills TEXT"))
+        rows = conn.execute(text("SELECT email, parsed_data FROM resumes")).mappings().all()
+        for row in rows:
+            parsed_data = row["parsed_data"]
+            if isinstance(parsed_data, str):
+                parsed_data = json.loads(parsed_data)
+            conn.execute(
+                text("UPDATE resumes SET skills = :skills WHERE email = :email"),
+                {"skills": skills_text(parsed_data), "email": row["email"]}
+            )
+    _create_search_indexes(conn)
+
+
+def _item_count(value):
+    # Non-empty leaf values of a section, to spot lists that validation merged
+    if isinstance(value, list):
+        return sum(1 for item in value if _item_count(item))
+    if isinstance(value, dict):
+        return sum(_item_count(item) for item in value.values())
+    return 0 if value in (None, "") else 1
+
+
+def _structured_resumes(conn):
+    # Bring resumes parsed before structured mode into the validated shape;
+    # rows that don't validate, or would lose or merge items of a section the
+    # interview prompts use (see prompt_context.project_resume), keep their payload
+    from prompt_context import project_resume
+    from resume_schema import ResumeValidationError, has_content, validate_resume
+
+    rows = conn.execute(text("SELECT email, parsed_data FROM resumes")).mappings().all()
+    for row in rows:
+        parsed_data = row["parsed_data"]
+        if isinstance(parsed_data, str):
+            parsed_data = json.loads(parsed_data)
+        parsed_data = normalise_parsed_resume(parsed_data)
+        if set(parsed_data) == {"result"}:
+            continue  # free text the old parser couldn't turn into JSON
+        try:
+            resume = validate_resume(json.dumps(parsed_data))
+        except ResumeValidationError:
+            continue
+        projected = project_resume(parsed_data)
+        if any(has_content(value) and not has_content(resume.get(name)) for name, value in projected.items()):
+            continue  # unrecognised section titles or entry layout
+        if any(
+            isinstance(resume.get(name), list) and _item_count(resume[name]) < _item_count(value)
+            for name, value in projected.items()
+        ):
+            continue  # items would be merged, keep the original
+        conn.execute(
+            text("UPDATE resumes SET parsed_data = :parsed, skills = :skills WHERE email = :email"),
+            {"parsed": json.dumps(resume), "skills": skills_text(resume), "email": row["email"]}
+        )
+
+
+def _opening_questions(conn):
+    OpeningQuestion.__table__.create(bind=conn, checkfirst=True)
+
+
+def _drop_parsed_data_index(conn):
+    # Searches use the skills column, the JSONB index only slowed down upserts
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("DROP INDEX IF EXISTS ix_resumes_parsed_data"))
+
+
+# (version, description, apply(connection)); append only, never edit applied steps
+MIGRATIONS = [
+    (1, "baseline schema", _baseline),
+    (2, "split parsed resume into parsed_data, drop full_data", _split_resume_payload),
+    (3, "skills column and candidate search indexes", _candidate_search),
+    (4, "validate stored resumes into the structured schema", _structured_resumes),
+    (5, "opening_questions table for pre-generated first questions", _opening_questions),
+    (6, "drop the unused parsed_data GIN index", _drop_parsed_data_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    if not inspect(conn).has_table("schema_version"):
+        return None
+    versions = conn.execute(select(schema_version.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def _stamp(conn, version, description):
+    conn.execute(schema_version.insert().values(
+        version=version, description=description, applied_at=datetime.utcnow()
+    ))
+
+
+def _predates_migrations(conn):
+    # Tables from before schema_version existed, create_all won't alter them
+    return current_version(conn) is None and inspect(conn).has_table("resumes")
+
+
+def init():
+    """Create every table for a new database and mark it as fully migrated.
+
+    Returns False without touching the database if it already has tables.
+    """
+    with get_engine().begin() as conn:
+        if current_version(conn) is not None:
+            print("Database already initialised, use 'upgrade' instead")
+            return False
+        if _predates_migrations(conn):
+            print("Database has tables from before migrations, use 'upgrade' instead")
+            return False
+        _metadata.create_all(bind=conn)
+        Base.metadata.create_all(bind=conn)
+        _create_search_indexes(conn)
+        for version, description, _ in MIGRATIONS:
+            _stamp(conn, version, description)
+    print(f"Database initialised at version {LATEST_VERSION}")
+    return True
+
+
+def upgrade():
+    """Apply pending migrations, each in its own transaction."""
+    with get_engine().begin() as conn:
+        _metadata.create_all(bind=conn)
+        version = current_version(conn) or 0
+
+    applied = 0
+    for target, description, apply in MIGRATIONS:
+        if target <= version:
+            continue
+        with get_engine().begin() as conn:
+            apply(conn)
+            _stamp(conn, target, description)
+        print(f"Applied migration {target}: {description}")
+        applied += 1
+    print(f"Database at version {LATEST_VERSION}" + ("" if applied else " (nothing to do)"))
+
+
+def check_schema():
+    """One-time startup check, returns an error message if the schema is behind."""
+    try:
+        with get_engine().connect() as conn:
+            version = current_version(conn)
+            predates = _predates_migrations(conn)
+    except Exception as e:
+        return f"Database unavailable: {e}"
+    if predates:
+        return "Database schema predates migrations, run: python db_migrate.py upgrade"
+    if version is None:
+        return "Database schema missing, run: python db_migrate.py init"
+    if version < LATEST_VERSION:
+        return f"Database schema at version {version}, run: python db_migrate.py upgrade"
+    return None
+
+
+class SchemaStatus:
+    """check_schema() run in the background, for pages that shouldn't wait on the DB.
+
+    Only a passing result is kept. After a failure the next call checks
+    again, so a database that comes up later or an upgrade run while the
+    app is up is picked up without a restart.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="schema-check")
+        self._lock = threading.Lock()
+        self._future = None
+        self._last_problem = None
+        self._ok = False
+
+    def problem(self, wait=False):
+        """Error message, or None when the schema is current.
+
+        Without ``wait`` a check still in flight reports the previous result.
+        """
+        with self._lock:
+            if self._ok:
+                return None
+            future = self._future
+            if future is None or future.done():
+                if future is not None:
+                    self._last_problem = future.result()
+                    if self._last_problem is None:
+                        self._ok = True
+                        return None
+                future = self._future = self._executor.submit(check_schema)
+        if not wait and not future.done():
+            return self._last_problem
+        problem = future.result()
+        with self._lock:
+            self._last_problem = problem
+            self._ok = problem is None
+        return problem
+
+
+# One per process, shared by every Streamlit session
+schema_status = SchemaStatus()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Initialise or upgrade the database schema.")
+    parser.add_argument("command", choices=["init", "upgrade", "status"])
+    args = parser.parse_args(argv)
+
+    if args.command == "init":
+        return 0 if init() else 1
+    elif args.command == "upgrade":
+        upgrade()
+    else:
+        problem = check_schema()
+        print(problem or f"Database up to date at version {LATEST_VERSION}")
+        return 1 if problem else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
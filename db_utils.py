@@ -1,20 +1,124 @@
-from sqlalchemy import create_engine, Column, String, JSON, Text, DateTime, Boolean, inspect
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import (
+    create_engine, event, func, literal_column, or_, tuple_,
+    Column, ForeignKey, Integer, String, JSON, Text, DateTime, Boolean, LargeBinary
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import declarative_base, deferred, sessionmaker
+from contextlib import contextmanager
 from datetime import datetime
 from sqlalchemy.exc import IntegrityError
 from werkzeug.security import generate_password_hash, check_password_hash
+import hashlib
+import json
 import secrets
+import threading
+import time
 from dotenv import load_dotenv
+from prompt_context import unwrap_resume, resume_field
+from telemetry import metrics, stats_collector, traced
 import os
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+# Pool settings; pre-ping and recycle avoid stalls on connections dropped while idle
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+def _engine_options(url):
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    # SQLite (local dev) uses its own pool classes without size limits
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    return options
+
+# Created on first use so importing the models never loads a DB driver or connects
+_engine = None
+_engine_lock = threading.Lock()
+SessionLocal = sessionmaker()
 Base = declarative_base()
 
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.overflow_hits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def record_checkout(self, overflow):
+        with self._lock:
+            self.checkouts += 1
+            if overflow > 0:
+                self.overflow_hits += 1
+
+pool_metrics = PoolMetrics()
+
+def get_engine():
+    """The process-wide engine, created on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+                event.listen(engine, "checkout", _on_checkout)
+                _engine = engine
+    return _engine
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool = _engine.pool
+    overflow = pool.overflow() if hasattr(pool, "overflow") else 0
+    pool_metrics.record_checkout(overflow)
+
+def pool_stats() -> dict:
+    if _engine is None:
+        # Not worth creating an engine just to report an empty pool
+        return {}
+    pool = _engine.pool
+    with pool_metrics._lock:
+        stats = {
+            "checkouts": pool_metrics.checkouts,
+            "overflow_hits": pool_metrics.overflow_hits,
+            "wait_seconds_total": round(pool_metrics.wait_seconds_total, 6),
+            "wait_seconds_max": round(pool_metrics.wait_seconds_max, 6),
+        }
+    for name in ("size", "checkedout", "overflow", "checkedin"):
+        if hasattr(pool, name):
+            stats[name] = getattr(pool, name)()
+    return stats
+
+metrics.add_collector(stats_collector("db_pool", pool_stats))
+
+@contextmanager
+def session_scope():
+    """Session on a pooled connection: commit on success, rollback on error, always release."""
+    started = time.perf_counter()
+    connection = get_engine().connect()
+    pool_metrics.record_wait(time.perf_counter() - started)
+    db = SessionLocal(bind=connection)
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+        connection.close()
+
 class Resume(Base):
     __tablename__ = "resumes"
     
@@ -22,11 +126,39 @@ class Resume(Base):
     name = Column(String, nullable=False)
     phone = Column(String, nullable=False)
     position = Column(String)
-    raw_text = Column(Text)
-    full_data = Column(JSON)
+    processed_by = Column(String(50))
+    # Only loaded when explicitly accessed, interview lookups never need it
+    raw_text = deferred(Column(Text))
+    # Parsed resume only, JSONB on PostgreSQL; raw text is not duplicated here
+    parsed_data = Column(JSON().with_variant(JSONB(), "postgresql"))
+    # Flattened skills from parsed_data for full-text search, filled at save time
+    skills = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, onupdate=datetime.utcnow)
 
+# Columns needed to start an interview
+INTERVIEW_COLUMNS = (
+    Resume.email, Resume.name, Resume.phone, Resume.position, Resume.created_at, Resume.parsed_data
+)
+
+# Columns shown when listing candidates
+LISTING_COLUMNS = (
+    Resume.email, Resume.name, Resume.phone, Resume.position, Resume.skills, Resume.created_at
+)
+
+class OpeningQuestion(Base):
+    """Pre-generated first questions and their audio, see opening_questions.py."""
+    __tablename__ = "opening_questions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    email = Column(String, ForeignKey("resumes.email", ondelete="CASCADE"), nullable=False, index=True)
+    # resume_hash() of the parsed resume the question was generated from
+    resume_hash = Column(String(64), nullable=False)
+    question = Column(Text, nullable=False)
+    audio = deferred(Column(LargeBinary))
+    audio_format = Column(String(10))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class AdminUser(Base):
     __tablename__ = "admin_users"
     
@@ -38,73 +170,288 @@ class AdminUser(Base):
     last_login = Column(DateTime)
     api_key = Column(String(64), unique=True)
 
+class ResumeParseCache(Base):
+    __tablename__ = "resume_parse_cache"
+
+    # sha256 of model, prompt version and normalised resume text
+    cache_key = Column(String(64), primary_key=True)
+    model = Column(String(100), nullable=False)
+    prompt_version = Column(String(20), nullable=False)
+    result = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# Schema changes go through db_migrate.py, request paths assume the tables exist
 def create_tables():
     try:
-        Base.metadata.create_all(bind=engine)
+        Base.metadata.create_all(bind=get_engine())
         print("Tables created successfully")
     except Exception as e:
         print(f"Error creating tables: {e}")
 
 def create_admin_user(username: str, password: str, full_name: str):
-    db = SessionLocal()
     try:
-        if db.query(AdminUser).filter(AdminUser.username == username).first():
-            return False, "Username already exists"
-            
-        new_admin = AdminUser(
-            username=username,
-            password_hash=generate_password_hash(password),
-            full_name=full_name,
-            api_key=secrets.token_hex(32),
-            is_active=True
-        )
-        db.add(new_admin)
-        db.commit()
+        with session_scope() as db:
+            if db.query(AdminUser).filter(AdminUser.username == username).first():
+                return False, "Username already exists"
+
+            new_admin = AdminUser(
+                username=username,
+                password_hash=generate_password_hash(password),
+                full_name=full_name,
+                api_key=secrets.token_hex(32),
+                is_active=True
+            )
+            db.add(new_admin)
         return True, "Admin user created successfully"
     except Exception as e:
-        db.rollback()
         return False, f"Error creating admin: {str(e)}"
-    finally:
-        db.close()
 
+def get_cached_parse(cache_key: str):
+    with session_scope() as db:
+        entry = db.get(ResumeParseCache, cache_key)
+        return entry.result if entry else None
+
+def store_cached_parse(cache_key: str, model: str, prompt_version: str, result):
+    with session_scope() as db:
+        db.merge(ResumeParseCache(
+            cache_key=cache_key,
+            model=model,
+            prompt_version=prompt_version,
+            result=result
+        ))
+
+def _dialect_insert():
+    # ON CONFLICT upserts are dialect specific, None where there is no support
+    dialect = get_engine().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+def _resume_upsert(insert, rows: list):
+    """INSERT ... ON CONFLICT (email) DO UPDATE for the given resume rows.
+
+    updated_at is only set by the conflict branch, so RETURNING it tells
+    inserts (NULL) apart from updates.
+    """
+    now = datetime.utcnow()
+    stmt = insert(Resume).values([{**row, "created_at": now} for row in rows])
+    return stmt.on_conflict_do_update(
+        index_elements=[Resume.email],
+        set_={
+            "name": stmt.excluded.name,
+            "phone": stmt.excluded.phone,
+            "position": stmt.excluded.position,
+            "processed_by": stmt.excluded.processed_by,
+            "raw_text": stmt.excluded.raw_text,
+            "parsed_data": stmt.excluded.parsed_data,
+            "skills": stmt.excluded.skills,
+            "updated_at": now,
+        }
+    )
+
+def normalise_parsed_resume(parsed):
+    """The parsed resume as a JSON object, unwrapping {"result": "<json text>"} payloads."""
+    parsed = unwrap_resume(parsed)
+    return parsed if isinstance(parsed, dict) else {"result": parsed}
+
+def skills_text(parsed_data) -> str:
+    """Skills from a parsed resume as one space separated string, however they were nested."""
+    def flatten(value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                yield str(key)
+                yield from flatten(item)
+        elif isinstance(value, list):
+            for item in value:
+                yield from flatten(item)
+        elif value not in (None, ""):
+            yield str(value)
+
+    return " ".join(flatten(resume_field(parsed_data, "skills")))
+
+def resume_row(resume_data: dict, primary_key: str) -> dict:
+    """Column values for a resume from the admin payload (contact_info, parsed_resume, raw_text)."""
+    contact = resume_data["contact_info"]
+    parsed_data = normalise_parsed_resume(resume_data["parsed_resume"])
+    return {
+        "email": primary_key,
+        "name": contact["name"],
+        "phone": contact["phone"],
+        "position": contact.get("position", ""),
+        "processed_by": contact.get("processed_by"),
+        "raw_text": resume_data["raw_text"],
+        "parsed_data": parsed_data,
+        "skills": skills_text(parsed_data)
+    }
+
+@traced("db_candidate_lookup")
+def get_interview_candidate(email: str):
+    """Lean lookup of the fields an interview needs, without the raw resume text."""
+    with session_scope() as db:
+        row = db.query(*INTERVIEW_COLUMNS).filter(Resume.email == email).first()
+        return dict(row._mapping) if row else None
+
+def _like_prefix(value: str) -> str:
+    escaped = value.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+def encode_cursor(created_at, email) -> str:
+    return f"{created_at.isoformat()}|{email}"
+
+def decode_cursor(cursor: str):
+    created_at, email = cursor.split("|", 1)
+    return datetime.fromisoformat(created_at), email
+
+@traced("db_candidate_search")
+def search_candidates(position=None, prefix=None, skills=None, cursor=None, limit=50):
+    """One page of candidates, newest first, and the cursor for the next page (or None).
+
+    Keyset pagination on (created_at, email), so deep pages cost the same as
+    the first. ``prefix`` matches the start of the email or name, ignoring
+    case; ``skills`` is a full-text search over the parsed skills. Backed by
+    the indexes created in db_migrate.py.
+    """
+    with session_scope() as db:
+        query = db.query(*LISTING_COLUMNS)
+        if position:
+            query = query.filter(Resume.position == position)
+        if prefix:
+            pattern = _like_prefix(prefix.strip())
+            query = query.filter(or_(
+                func.lower(Resume.email).like(pattern, escape="\\"),
+                func.lower(Resume.name).like(pattern, escape="\\"),
+            ))
+        if skills and skills.strip():
+            if get_engine().dialect.name == "postgresql":
+                # Must match the ix_resumes_skills_fts expression to use the GIN index
+                config = literal_column("'simple'::regconfig")
+                query = query.filter(
+                    func.to_tsvector(config, func.coalesce(Resume.skills, "")).op("@@")(
+                        func.plainto_tsquery(config, skills)
+                    )
+                )
+            else:
+                for term in skills.lower().split():
+                    query = query.filter(func.lower(Resume.skills).contains(term, autoescape=True))
+        if cursor:
+            created_at, email = decode_cursor(cursor)
+            # Row-value comparison, so PostgreSQL seeks straight into the
+            # (created_at DESC, email DESC) indexes instead of filtering from the top
+            query = query.filter(tuple_(Resume.created_at, Resume.email) < tuple_(created_at, email))
+        rows = query.order_by(Resume.created_at.desc(), Resume.email.desc()).limit(limit + 1).all()
+
+    page = [dict(row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor(last["created_at"], last["email"])
+    return page, next_cursor
+
+def list_positions():
+    """Distinct positions, for the admin filter."""
+    with session_scope() as db:
+        rows = db.query(Resume.position).filter(Resume.position.isnot(None), Resume.position != "").distinct()
+        return sorted(row.position for row in rows)
+
+def resume_hash(parsed_data) -> str:
+    """Stable hash of a parsed resume, ties opening questions to the resume they were made for."""
+    canonical = json.dumps(parsed_data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _drop_stale_questions(db, rows):
+    for row in rows:
+        db.query(OpeningQuestion).filter(
+            OpeningQuestion.email == row["email"],
+            OpeningQuestion.resume_hash != resume_hash(row["parsed_data"])
+        ).delete(synchronize_session=False)
+
+def _write_resumes(db, rows: list) -> set:
+    """Insert or update resume rows, returns the emails that already existed."""
+    insert = _dialect_insert()
+    if insert is not None:
+        stmt = _resume_upsert(insert, rows).returning(Resume.email, Resume.updated_at)
+        return {email for email, updated_at in db.execute(stmt) if updated_at is not None}
+
+    # No ON CONFLICT on this dialect: select, then update or add through the ORM
+    existing = {
+        record.email: record
+        for record in db.query(Resume).filter(Resume.email.in_([row["email"] for row in rows]))
+    }
+    for row in rows:
+        record = existing.get(row["email"])
+        if record is None:
+            db.add(Resume(**row))
+        else:
+            for key, value in row.items():
+                setattr(record, key, value)
+    return set(existing)
+
+@traced("save_parsed_resume")
 def save_parsed_resume(resume_data: dict, primary_key: str):
-    db = SessionLocal()
+    """Insert or update one resume, in a single statement where the dialect allows."""
+    row = resume_row(resume_data, primary_key)
     try:
-        inspector = inspect(engine)
-        if not inspector.has_table("resumes"):
-            create_tables()
-        
-        existing = db.query(Resume).filter(Resume.email == primary_key).first()
-        
-        if existing:
-            existing.name = resume_data["contact_info"]["name"]
-            existing.phone = resume_data["contact_info"]["phone"]
-            existing.position = resume_data["contact_info"].get("position", "")
-            existing.raw_text = resume_data["raw_text"]
-            existing.full_data = resume_data
-            action = "updated"
-        else:
-            new_resume = Resume(
-                email=primary_key,
-                name=resume_data["contact_info"]["name"],
-                phone=resume_data["contact_info"]["phone"],
-                position=resume_data["contact_info"].get("position", ""),
-                raw_text=resume_data["raw_text"],
-                full_data=resume_data
-            )
-            db.add(new_resume)
-            action = "created"
-        
-        db.commit()
+        with session_scope() as db:
+            updated = bool(_write_resumes(db, [row]))
+            if updated:
+                # Questions made for the previous version of the resume
+                _drop_stale_questions(db, [row])
+        action = "updated" if updated else "created"
         return True, f"Record {action} successfully for {primary_key}"
     except IntegrityError as e:
-        db.rollback()
         return False, f"Database integrity error: {str(e)}"
     except Exception as e:
-        db.rollback()
         return False, f"Database error: {str(e)}"
-    finally:
-        db.close()
 
-# Initialize database
-create_tables()
\ No newline at end of file
+def upsert_resumes(rows: list):
+    """Insert or update many resumes in one transaction, keyed on email.
+
+    Each row is built with resume_row().
+    """
+    # A batch may not touch the same email twice, the last one wins
+    by_email = {row["email"]: row for row in rows}
+    if not by_email:
+        return 0
+
+    with session_scope() as db:
+        updated = _write_resumes(db, list(by_email.values()))
+        _drop_stale_questions(db, [row for email, row in by_email.items() if email in updated])
+    return len(by_email)
+
+def store_opening_questions(email: str, expected_hash: str, questions: list) -> bool:
+    """Replace the candidate's opening question pool.
+
+    Each question is a dict with question, audio and audio_format. Returns
+    False without writing if the resume changed since generation started.
+    """
+    with session_scope() as db:
+        parsed_data = db.query(Resume.parsed_data).filter(Resume.email == email).scalar()
+        if parsed_data is None or resume_hash(parsed_data) != expected_hash:
+            return False
+        db.query(OpeningQuestion).filter(OpeningQuestion.email == email).delete(synchronize_session=False)
+        db.add_all(OpeningQuestion(email=email, resume_hash=expected_hash, **question) for question in questions)
+    return True
+
+@traced("db_opening_question")
+def get_opening_question(email: str, expected_hash: str):
+    """A random question from the candidate's current pool, with its audio, or None."""
+    with session_scope() as db:
+        row = db.query(OpeningQuestion.question, OpeningQuestion.audio, OpeningQuestion.audio_format).filter(
+            OpeningQuestion.email == email, OpeningQuestion.resume_hash == expected_hash
+        ).order_by(func.random()).first()
+        return dict(row._mapping) if row else None
+
+def has_opening_questions(email: str, expected_hash: str) -> bool:
+    """Whether a pool already exists for this version of the resume."""
+    with session_scope() as db:
+        return db.query(OpeningQuestion.id).filter(
+            OpeningQuestion.email == email, OpeningQuestion.resume_hash == expected_hash
+        ).first() is not None
+
+def list_candidate_emails():
+    with session_scope() as db:
+        return [email for email, in db.query(Resume.email).order_by(Resume.created_at)]
@@ -0,0 +1,120 @@
+"""Cold-start import report for the Streamlit entry points.
+
+    python import_report.py                    # app.py and admin.py
+    python import_report.py admin.py --json    # machine-readable
+    python import_report.py --top 20
+
+The entry points render pages when imported, so instead each one's
+module-level imports are replayed in a fresh interpreter under
+``-X importtime``. The report shows total import time, the slowest
+top-level packages and any heavy module that was loaded eagerly. It exits
+non-zero when a module listed in HEAVY_MODULES is imported at start-up.
+"""
+import argparse
+import ast
+import json
+import re
+import subprocess
+import sys
+
+ENTRY_POINTS = ["app.py", "admin.py"]
+# Must only load on first use or in a background warm-up, never at import
+HEAVY_MODULES = {
+    "app.py": ["torch", "whisper", "pyttsx3", "streamlit_webrtc", "tiktoken"],
+    "admin.py": ["torch", "whisper", "pyttsx3", "streamlit_webrtc", "tiktoken"],
+}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def module_level_imports(path):
+    """import statements at the top level of a script, including inside try blocks."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+
+    statements = []
+
+    def visit(body):
+        for node in body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                statements.append(ast.unparse(node))
+            elif isinstance(node, ast.Try):
+                visit(node.body)
+
+    visit(tree.body)
+    return statements
+
+
+def _probe_script(statements):
+    lines = ["_failed = []"]
+    for statement in statements:
+        lines += [
+            "try:",
+            f"    {statement}",
+            "except Exception as _e:",
+            f"    _failed.append([{statement!r}, repr(_e)])",
+        ]
+    # Imported last so the probe's own imports aren't timed
+    lines.append("import json as _json, sys as _sys")
+    lines.append("print(_json.dumps({'modules': sorted(_sys.modules), 'failed': _failed}))")
+    return "\n".join(lines)
+
+
+def measure(path, top=10):
+    statements = module_level_imports(path)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _probe_script(statements)],
+        capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        return {"entry_point": path, "error": proc.stderr.strip().splitlines()[-1:]}
+
+    # The least indented entries are the top-level imports, they add up to the total
+    indent = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            indent.setdefault(len(match.group(3)), []).append((match.group(4), int(match.group(2))))
+    roots = indent.get(min(indent), []) if indent else []
+
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+    loaded = set(probe["modules"])
+    heavy = [name for name in HEAVY_MODULES.get(path, []) if name in loaded]
+    slowest = sorted(roots, key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "entry_point": path,
+        "total_ms": round(sum(us for _, us in roots) / 1000, 1),
+        "modules_loaded": len(loaded),
+        "slowest": [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in slowest],
+        "heavy_loaded": heavy,
+        "failed_imports": probe["failed"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report import time of the Streamlit entry points.")
+    parser.add_argument("entry_points", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    reports = [measure(path, args.top) for path in args.entry_points]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            if "error" in report:
+                print(f"{report['entry_point']}: failed - {' '.join(report['error'])}")
+                continue
+            print(f"{report['entry_point']}: {report['total_ms']} ms, {report['modules_loaded']} modules")
+            for item in report["slowest"]:
+                print(f"  {item['cumulative_ms']:>9} ms  {item['module']}")
+            if report["heavy_loaded"]:
+                print(f"  loaded eagerly: {', '.join(report['heavy_loaded'])}")
+            for statement, error in report["failed_imports"]:
+                print(f"  not importable here: {statement} ({error})")
+    return 1 if any(report.get("heavy_loaded") for report in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,260 @@
 # backend.py (FastAPI app)
-from fastapi import FastAPI
+import asyncio
+import functools
+import json
+import random
+import time
+from contextlib import asynccontextmanager
+import httpx
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from groq import Groq
+from groq import AsyncGroq, APIConnectionError, APIStatusError
 from dotenv import load_dotenv
+from session_store import SessionStore
+from parse_cache import ParseCache
+from resume_schema import RESUME_JSON_SHAPE, ResumeValidationError, validate_resume
+from prompt_context import TOKEN_BUDGETS, build_resume_context, count_tokens, truncate_text
+from telemetry import (
+    CORRELATION_HEADER, PROMETHEUS_CONTENT_TYPE, correlation_id, metrics, new_correlation_id,
+    record_duration, render_metrics, span, stats_collector
+)
 import os
 
-app = FastAPI()
 load_dotenv()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+LLM_MODEL = os.getenv("LLM_MODEL", "llama3-70b-8192")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+
+# Bump whenever the parse prompt changes so cached parses are not reused
+PARSE_PROMPT_VERSION = "1"
+STRUCTURED_PARSE_PROMPT_VERSION = "structured-2"
+
+HISTORY_TURNS = int(os.getenv("INTERVIEW_HISTORY_TURNS", "6"))
+
+client = None
+sessions = SessionStore()
+parse_cache = ParseCache(LLM_MODEL, PARSE_PROMPT_VERSION, use_db=os.getenv("PARSE_CACHE_DB", "1") == "1")
+structured_parse_cache = ParseCache(
+    LLM_MODEL, STRUCTURED_PARSE_PROMPT_VERSION, use_db=os.getenv("PARSE_CACHE_DB", "1") == "1"
+)
+# Running prompt/completion token totals per endpoint
+token_usage = {}
+# Bounds in-flight provider calls across all requests on this worker
+llm_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+metrics.add_collector(stats_collector("parse_cache", parse_cache.stats))
+metrics.add_collector(stats_collector("structured_parse_cache", structured_parse_cache.stats))
+metrics.add_collector(lambda: [("interview_sessions", {}, len(sessions))])
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global client
+    # One pooled HTTP client reused for every provider call
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONCURRENCY,
+            max_keepalive_connections=LLM_MAX_CONCURRENCY,
+            keepalive_expiry=60,
+        ),
+        timeout=httpx.Timeout(LLM_TIMEOUT, connect=5.0),
+    )
+    client = AsyncGroq(
+        api_key=os.getenv("GROQ_API_KEY"),
+        http_client=http_client,
+        timeout=LLM_TIMEOUT,
+        max_retries=0,
+    )
+    try:
+        yield
+    finally:
+        await client.close()
+        client = None
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def correlate_and_time(request: Request, call_next):
+    # Correlation ID from the Streamlit session, or a fresh one per request
+    cid = request.headers.get(CORRELATION_HEADER) or new_correlation_id()
+    correlation_id.set(cid)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        route = request.scope.get("route")
+        metrics.observe(
+            "http_request_duration_seconds", time.perf_counter() - started,
+            method=request.method, route=getattr(route, "path", "unmatched"), status=status
+        )
+    response.headers[CORRELATION_HEADER] = cid
+    return response
+
+
+def _is_retryable(error):
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    # Covers connection failures and timeouts
+    return isinstance(error, APIConnectionError)
+
+
+def _retry_delay(error, attempt):
+    # Honour Retry-After on 429s, otherwise full-jitter exponential backoff
+    retry_after = None
+    if isinstance(error, APIStatusError):
+        retry_after = error.response.headers.get("retry-after")
+    try:
+        if retry_after is not None:
+            return min(float(retry_after), RETRY_MAX_DELAY)
+    except ValueError:
+        pass
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def chat_completion(prompt: str, temperature: float, **kwargs):
+    """Single-prompt completion with bounded concurrency, timeout and retries."""
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            async with llm_slots:
+                return await client.chat.completions.create(
+                    model=LLM_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature,
+                    timeout=LLM_TIMEOUT,
+                    **kwargs,
+                )
+        except Exception as e:
+            if attempt == LLM_MAX_RETRIES or not _is_retryable(e):
+                raise
+            await asyncio.sleep(_retry_delay(e, attempt))
+
+async def chat_completion_stream(prompt: str, temperature: float):
+    """Yield completion text deltas as the provider emits them.
+
+    Retries only apply until the stream is open; once tokens have been
+    forwarded a failure is surfaced to the caller.
+    """
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            await llm_slots.acquire()
+            try:
+                stream = await client.chat.completions.create(
+                    model=LLM_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature,
+                    timeout=LLM_TIMEOUT,
+                    stream=True,
+                )
+            except Exception:
+                llm_slots.release()
+                raise
+        except Exception as e:
+            if attempt == LLM_MAX_RETRIES or not _is_retryable(e):
+                raise
+            await asyncio.sleep(_retry_delay(e, attempt))
+            continue
+
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Also runs when the SSE client disconnects, so the HTTP
+            # connection goes back to the pool instead of leaking
+            try:
+                await stream.close()
+            finally:
+                llm_slots.release()
+        return
+
+
+def record_usage(endpoint: str, prompt: str, context_tokens: int, response=None, completion: str = ""):
+    """Token counts for one call, from the provider when it reports them."""
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+    else:
+        prompt_tokens, completion_tokens = count_tokens(prompt), count_tokens(completion)
+
+    totals = token_usage.setdefault(
+        endpoint, {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "context_tokens": 0}
+    )
+    totals["requests"] += 1
+    totals["prompt_tokens"] += prompt_tokens
+    totals["completion_tokens"] += completion_tokens
+    totals["context_tokens"] += context_tokens
+    metrics.inc("llm_prompt_tokens_total", prompt_tokens, endpoint=endpoint)
+    metrics.inc("llm_completion_tokens_total", completion_tokens, endpoint=endpoint)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "context_tokens": context_tokens,
+    }
+
+
+async def complete(endpoint: str, prompt: str, context_tokens: int, temperature: float = 0.7, **kwargs):
+    """Completion text and usage, timed as the provider_wait and response stages."""
+    with span("provider_wait", endpoint=endpoint):
+        response = await chat_completion(prompt, temperature=temperature, **kwargs)
+    with span("response", endpoint=endpoint):
+        return response.choices[0].message.content.strip(), record_usage(endpoint, prompt, context_tokens, response)
+
+
+def _sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def sse_question_stream(endpoint: str, prompt: str, context_tokens: int,
+                        temperature: float = 0.7, on_complete=None):
+    """Server-sent events: one {"token"} event per delta, then {"done", "question", "usage"}."""
+    async def events():
+        parts = []
+        started = time.perf_counter()
+        first_token_at = None
+        tokens = chat_completion_stream(prompt, temperature)
+        try:
+            async for token in tokens:
+                if first_token_at is None:
+                    # Provider wait is the time to first token when streaming
+                    first_token_at = time.perf_counter()
+                    record_duration("provider_wait", first_token_at - started, endpoint=endpoint)
+                parts.append(token)
+                yield _sse({"token": token})
+        except Exception as e:
+            metrics.inc("stage_errors_total", stage="provider_wait", endpoint=endpoint)
+            yield _sse({"error": str(e)})
+            return
+        finally:
+            # Close the provider stream now rather than when it is garbage collected
+            await tokens.aclose()
+        record_duration("response", time.perf_counter() - (first_token_at or started), endpoint=endpoint)
+        question = "".join(parts).strip()
+        if on_complete:
+            on_complete(question)
+        usage = record_usage(endpoint, prompt, context_tokens, completion=question)
+        yield _sse({"done": True, "question": question, "usage": usage})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 class ResumeRequest(BaseModel):
     resume_text: str
+    # JSON mode plus schema validation, returns the resume as an object
+    structured: bool = False
 
 class FollowUpRequest(BaseModel):
     parsed_resume: str
@@ -20,9 +263,37 @@ class FollowUpRequest(BaseModel):
 class FirstQuestionRequest(BaseModel):
     parsed_resume: str
 
+class SessionRequest(BaseModel):
+    email: Optional[str] = None
+    parsed_resume: Optional[str] = None
+    # Pre-generated first question already shown to the candidate
+    opening_question: Optional[str] = None
+
+class SessionAnswerRequest(BaseModel):
+    last_answer: str
+
 @app.post("/parse-resume/")
-def parse_resume(req: ResumeRequest):
-    prompt = f"""
+async def parse_resume(req: ResumeRequest):
+    if req.structured:
+        return await parse_resume_structured(req.resume_text)
+
+    # The parse runs at temperature 0, so identical resumes give identical results
+    cache_key = parse_cache.key_for(req.resume_text)
+    cached = await parse_cache.get(cache_key)
+    if cached is not None:
+        return {"result": cached, "cached": True}
+
+    with span("prompt_build", endpoint="parse_resume"):
+        resume_text = truncate_text(req.resume_text, TOKEN_BUDGETS["parse_resume"])
+        resume_tokens = count_tokens(resume_text)
+        prompt = parse_prompt(resume_text)
+
+    result, usage = await complete("parse_resume", prompt, resume_tokens, temperature=0)
+    await parse_cache.put(cache_key, result)
+    return {"result": result, "usage": usage, "cached": False}
+
+def parse_prompt(resume_text: str) -> str:
+    return f"""
     You are an advanced AI resume parser. Your task is to extract structured information from resumes written in any format.
 
     Always extract the following fields if present:
@@ -42,42 +313,114 @@ def parse_resume(req: ResumeRequest):
     Be tolerant of inconsistent formatting and varied section titles. Return your output in clean JSON format.
 
     Resume:
-    {req.resume_text}
+    {resume_text}
     """
 
-    response = client.chat.completions.create(
-        model="llama3-70b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0,
-    )
-    return {"result": response.choices[0].message.content.strip()}
+def structured_parse_prompt(resume_text: str) -> str:
+    return f"""
+    You are an advanced AI resume parser. Extract the candidate's details from the resume below.
 
-@app.post("/generate-question/")
-def generate_first_question(req: FirstQuestionRequest):
-    prompt = f"""
+    Respond with a single JSON object with exactly these keys:
+    {RESUME_JSON_SHAPE}
+
+    Use null or an empty list when a section is missing. Projects may be titled Personal Projects,
+    Notable Work or Freelance; certifications may appear under Licenses or Courses Completed;
+    languages covers spoken and programming languages.
+
+    Resume:
+    {resume_text}
+    """
+
+def repair_prompt(parse_prompt_text: str, output, error: str) -> str:
+    return f"""{parse_prompt_text}
+    Your previous answer did not match the required JSON.
+
+    Error:
+    {error}
+
+    Previous answer:
+    {output or "(rejected by the provider as invalid JSON)"}
+
+    Respond with the corrected JSON object only.
+    """
+
+async def structured_completion(endpoint: str, prompt: str, context_tokens: int):
+    """JSON-mode completion and its validation: (resume or None, raw output, error, usage).
+
+    Provider-side JSON failures (HTTP 400) count as invalid output.
+    """
+    try:
+        content, usage = await complete(
+            endpoint, prompt, context_tokens, temperature=0, response_format={"type": "json_object"}
+        )
+    except APIStatusError as e:
+        if e.status_code != 400:
+            raise
+        return None, None, str(e), None
+    try:
+        return validate_resume(content), content, None, usage
+    except ResumeValidationError as e:
+        return None, content, str(e), usage
+
+async def parse_resume_structured(resume_text: str):
+    """Parse into a validated resume object, with one repair attempt on invalid output."""
+    cache_key = structured_parse_cache.key_for(resume_text)
+    cached = await structured_parse_cache.get(cache_key)
+    if cached is not None:
+        return {"result": cached, "cached": True, "repaired": False}
+
+    with span("prompt_build", endpoint="parse_resume"):
+        text = truncate_text(resume_text, TOKEN_BUDGETS["parse_resume"])
+        resume_tokens = count_tokens(text)
+        prompt = structured_parse_prompt(text)
+
+    result, output, error, usage = await structured_completion("parse_resume", prompt, resume_tokens)
+    repaired = result is None
+    if repaired:
+        result, output, error, usage = await structured_completion(
+            "parse_resume_repair", repair_prompt(prompt, output, error), resume_tokens
+        )
+    if result is None:
+        metrics.inc("resume_parse_invalid_total")
+        raise HTTPException(status_code=422, detail=f"Resume parse failed validation: {error}")
+
+    await structured_parse_cache.put(cache_key, result)
+    return {"result": result, "usage": usage, "cached": False, "repaired": repaired}
+
+def first_question_prompt(resume_context: str) -> str:
+    return f"""
     You are an AI interviewer. Based on the candidate's resume (in JSON), ask the first question to begin the interview.
     Be natural and professional. Choose a relevant question based on experience, skills, or projects.
 
     Resume:
-    {req.parsed_resume}
+    {resume_context}
     """
-    response = client.chat.completions.create(
-        model="llama3-70b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7,
-    )
-    return {"question": response.choices[0].message.content.strip()}
 
-@app.post("/next-question/")
-def next_question(req: FollowUpRequest):
-    prompt = f"""
+def format_history(history) -> str:
+    # Newest turns first until the history budget is spent
+    lines, remaining = [], TOKEN_BUDGETS["history"]
+    for turn in reversed(history[-HISTORY_TURNS:]):
+        line = f"Q: {turn['question']}\nA: {truncate_text(turn['answer'], TOKEN_BUDGETS['answer'])}"
+        remaining -= count_tokens(line)
+        if remaining < 0:
+            break
+        lines.append(line)
+    if not lines:
+        return "None yet."
+    return "\n".join(reversed(lines))
+
+def next_question_prompt(resume_context: str, last_answer: str, history=()) -> str:
+    return f"""
     You are acting as an AI Interviewer. Based on the candidate's resume and the previous response, ask a relevant follow-up question.
 
     Resume (in JSON):
-    {req.parsed_resume}
+    {resume_context}
+
+    Interview So Far:
+    {format_history(history)}
 
     Candidate's Previous Response:
-    {req.last_answer}
+    {truncate_text(last_answer, TOKEN_BUDGETS["answer"])}
 
     Your job:
     - Ask one intelligent follow-up or related question.
@@ -85,9 +428,123 @@ def next_question(req: FollowUpRequest):
     - Ask technical, behavioral, or role-relevant questions.
     - Return only the question.
     """
-    response = client.chat.completions.create(
-        model="llama3-70b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7,
+
+@app.post("/generate-question/")
+async def generate_first_question(req: FirstQuestionRequest):
+    with span("prompt_build", endpoint="first_question"):
+        context, context_tokens = build_resume_context(req.parsed_resume, TOKEN_BUDGETS["first_question"])
+        prompt = first_question_prompt(context)
+    question, usage = await complete("first_question", prompt, context_tokens)
+    return {"question": question, "usage": usage}
+
+@app.post("/generate-question/stream")
+async def generate_first_question_stream(req: FirstQuestionRequest):
+    with span("prompt_build", endpoint="first_question"):
+        context, context_tokens = build_resume_context(req.parsed_resume, TOKEN_BUDGETS["first_question"])
+        prompt = first_question_prompt(context)
+    return sse_question_stream("first_question", prompt, context_tokens)
+
+@app.post("/next-question/")
+async def next_question(req: FollowUpRequest):
+    with span("prompt_build", endpoint="next_question"):
+        context, context_tokens = build_resume_context(req.parsed_resume, TOKEN_BUDGETS["next_question"])
+        prompt = next_question_prompt(context, req.last_answer)
+    question, usage = await complete("next_question", prompt, context_tokens)
+    return {"question": question, "usage": usage}
+
+@app.post("/next-question/stream")
+async def next_question_stream(req: FollowUpRequest):
+    with span("prompt_build", endpoint="next_question"):
+        context, context_tokens = build_resume_context(req.parsed_resume, TOKEN_BUDGETS["next_question"])
+        prompt = next_question_prompt(context, req.last_answer)
+    return sse_question_stream("next_question", prompt, context_tokens)
+
+@app.get("/usage")
+async def usage_totals():
+    return {
+        "tokens": token_usage,
+        "parse_cache": parse_cache.stats(),
+        "structured_parse_cache": structured_parse_cache.stats(),
+    }
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+def load_resume(email: str):
+    # Imported lazily so the backend only needs a database for email sessions
+    from db_utils import get_interview_candidate
+
+    candidate = get_interview_candidate(email)
+    return json.dumps(candidate["parsed_data"]) if candidate else None
+
+def get_session(session_id: str):
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Interview session not found or expired")
+    return session
+
+@app.post("/sessions/")
+async def create_session(req: SessionRequest):
+    """Start an interview session so later turns only send the new answer."""
+    if req.email:
+        resume = await asyncio.to_thread(load_resume, req.email)
+        if resume is None:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+    elif req.parsed_resume:
+        resume = req.parsed_resume
+    else:
+        raise HTTPException(status_code=422, detail="Provide a candidate email or parsed resume")
+
+    # Compacted once here instead of on every turn
+    with span("prompt_build", endpoint="create_session"):
+        context, context_tokens = build_resume_context(resume, TOKEN_BUDGETS["next_question"])
+    session = sessions.create(context, email=req.email)
+    session.context_tokens = context_tokens
+    if req.opening_question:
+        session.record_question(req.opening_question)
+    return {"session_id": session.session_id, "expires_in": sessions.ttl, "context_tokens": context_tokens}
+
+@app.delete("/sessions/{session_id}")
+async def end_session(session_id: str):
+    return {"deleted": sessions.delete(session_id)}
+
+@app.post("/sessions/{session_id}/generate-question/")
+async def session_first_question(session_id: str):
+    session = get_session(session_id)
+    with span("prompt_build", endpoint="first_question"):
+        prompt = first_question_prompt(session.resume)
+    question, usage = await complete("first_question", prompt, session.context_tokens)
+    session.record_question(question)
+    return {"question": question, "usage": usage}
+
+@app.post("/sessions/{session_id}/generate-question/stream")
+async def session_first_question_stream(session_id: str):
+    session = get_session(session_id)
+    with span("prompt_build", endpoint="first_question"):
+        prompt = first_question_prompt(session.resume)
+    return sse_question_stream(
+        "first_question", prompt, session.context_tokens, on_complete=session.record_question
+    )
+
+@app.post("/sessions/{session_id}/next-question/")
+async def session_next_question(session_id: str, req: SessionAnswerRequest):
+    session = get_session(session_id)
+    # Earlier turns only, the new answer goes in once as the previous response
+    with span("prompt_build", endpoint="next_question"):
+        prompt = next_question_prompt(session.resume, req.last_answer, session.history)
+    question, usage = await complete("next_question", prompt, session.context_tokens)
+    # Only once the provider succeeded, so a retried answer isn't lost
+    session.record_turn(req.last_answer, question)
+    return {"question": question, "usage": usage}
+
+@app.post("/sessions/{session_id}/next-question/stream")
+async def session_next_question_stream(session_id: str, req: SessionAnswerRequest):
+    session = get_session(session_id)
+    # Earlier turns only, the new answer goes in once as the previous response
+    with span("prompt_build", endpoint="next_question"):
+        prompt = next_question_prompt(session.resume, req.last_answer, session.history)
+    return sse_question_stream(
+        "next_question", prompt, session.context_tokens,
+        on_complete=functools.partial(session.record_turn, req.last_answer)
     )
-    return {"question": response.choices[0].message.content.strip()}
\ No newline at end of file
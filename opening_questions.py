@@ -0,0 +1,139 @@
+"""Background pre-generation of opening interview questions.
+
+After a resume is saved, a small pool of first questions is generated
+through the backend, synthesised to audio and stored with the candidate, so
+an interview can start with no LLM or TTS wait. The pool is tied to a hash
+of the parsed resume: updating the resume drops the old pool and schedules
+a new one.
+
+Pools for candidates saved before this existed can be filled with:
+
+    python opening_questions.py --all
+    python opening_questions.py alice@example.com bob@example.com
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
+POOL_SIZE = int(os.getenv("OPENING_QUESTION_POOL", "3"))
+WORKERS = int(os.getenv("OPENING_QUESTION_WORKERS", "2"))
+ENABLED = os.getenv("PREGENERATE_QUESTIONS", "1") == "1"
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="opening-questions")
+        return _executor
+
+
+def generate_pool(email, parsed_data, size=POOL_SIZE, force=False):
+    """Generate and store ``size`` distinct opening questions with audio.
+
+    Does nothing when a pool already exists for this exact resume (a
+    re-save that only fixed contact details), unless ``force`` is set.
+    Returns False if the resume changed while the pool was being made.
+    """
+    from db_utils import has_opening_questions, normalise_parsed_resume, resume_hash, store_opening_questions
+    from tts_engine import text_to_speech_clip
+
+    parsed_data = normalise_parsed_resume(parsed_data)
+    expected_hash = resume_hash(parsed_data)
+    if not force and has_opening_questions(email, expected_hash):
+        return True
+    questions, seen = [], set()
+    with requests.Session() as http:
+        # A few extra attempts in case the model repeats itself
+        for _ in range(size * 2):
+            if len(questions) == size:
+                break
+            response = http.post(
+                f"{BACKEND_URL}/generate-question/",
+                json={"parsed_resume": json.dumps(parsed_data)},
+                timeout=60
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"API Error: {response.status_code} - {response.text}")
+            question = response.json()["question"]
+            if question in seen:
+                continue
+            seen.add(question)
+            audio, audio_format = text_to_speech_clip(question)
+            questions.append({"question": question, "audio": audio, "audio_format": audio_format})
+
+    if not questions:
+        return False
+    return store_opening_questions(email, expected_hash, questions)
+
+
+def _log_failure(email):
+    def done(future):
+        if future.exception() is not None:
+            logger.warning("Opening questions for %s failed: %s", email, future.exception())
+    return done
+
+
+def schedule(email, parsed_data):
+    """Queue pool generation for a saved resume, returns the future (None when disabled)."""
+    if not ENABLED:
+        return None
+    future = _get_executor().submit(generate_pool, email, parsed_data)
+    future.add_done_callback(_log_failure(email))
+    return future
+
+
+def wait():
+    """Block until every scheduled pool is done, for command line runs."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate opening questions for saved candidates.")
+    parser.add_argument("emails", nargs="*", help="Candidates to generate for")
+    parser.add_argument("--all", action="store_true", help="Every candidate without a current pool")
+    args = parser.parse_args(argv)
+    if not args.emails and not args.all:
+        parser.error("give candidate emails or --all")
+
+    from db_utils import get_interview_candidate, has_opening_questions, list_candidate_emails, resume_hash
+
+    emails = args.emails or list_candidate_emails()
+    futures = {}
+    for email in emails:
+        candidate = get_interview_candidate(email)
+        if candidate is None:
+            print(f"SKIPPED {email}: not found")
+            continue
+        if has_opening_questions(email, resume_hash(candidate["parsed_data"])):
+            continue
+        futures[email] = _get_executor().submit(generate_pool, email, candidate["parsed_data"])
+
+    failed = 0
+    for email, future in futures.items():
+        try:
+            future.result()
+        except Exception as e:
+            failed += 1
+            print(f"FAILED {email}: {e}")
+    wait()
+    print(f"Generated opening questions for {len(futures) - failed}/{len(futures)} candidates")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
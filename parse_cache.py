@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import os
+
+from resume_text import preprocess_resume_text
+
+logger = logging.getLogger(__name__)
+
+PARSE_CACHE_SIZE = int(os.getenv("PARSE_CACHE_SIZE", "512"))
+
+
+def parse_cache_key(resume_text: str, model: str, prompt_version: str) -> str:
+    """Hash of the normalised text, so whitespace-only differences share an entry."""
+    normalised = preprocess_resume_text(resume_text)
+    raw = "\x1f".join([model, prompt_version, normalised])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """In-process LRU in front of the resume_parse_cache table.
+
+    Bumping the prompt version changes every key, so stale parses are
+    simply never looked up again.
+    """
+
+    def __init__(self, model, prompt_version, max_entries=PARSE_CACHE_SIZE, use_db=True):
+        self.model = model
+        self.prompt_version = prompt_version
+        self.max_entries = max_entries
+        self.use_db = use_db
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def key_for(self, resume_text):
+        return parse_cache_key(resume_text, self.model, self.prompt_version)
+
+    async def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        result = None
+        if self.use_db:
+            try:
+                from db_utils import get_cached_parse
+                result = await asyncio.to_thread(get_cached_parse, key)
+            except Exception as e:
+                logger.warning("Parse cache lookup failed: %s", e)
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.db_hits += 1
+        self._remember(key, result)
+        return result
+
+    async def put(self, key, result):
+        self._remember(key, result)
+        if self.use_db:
+            try:
+                from db_utils import store_cached_parse
+                await asyncio.to_thread(store_cached_parse, key, self.model, self.prompt_version, result)
+            except Exception as e:
+                logger.warning("Parse cache write failed: %s", e)
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.db_hits + self.misses
+            return {
+                "hits": self.hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.db_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
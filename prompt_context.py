@@ -0,0 +1,184 @@
+import json
+import re
+import os
+import threading
+
+# Loaded on the first token count, the BPE tables take a while to read
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+# Per-endpoint prompt token budgets for the resume context
+TOKEN_BUDGETS = {
+    "parse_resume": int(os.getenv("PROMPT_BUDGET_PARSE", "6000")),
+    "first_question": int(os.getenv("PROMPT_BUDGET_FIRST_QUESTION", "1200")),
+    "next_question": int(os.getenv("PROMPT_BUDGET_NEXT_QUESTION", "1200")),
+    "answer": int(os.getenv("PROMPT_BUDGET_ANSWER", "600")),
+    "history": int(os.getenv("PROMPT_BUDGET_HISTORY", "800")),
+}
+
+# Fields worth asking about, most important first; anything else is dropped
+RELEVANT_FIELDS = [
+    ("skills", ("skills", "technical skills", "key skills")),
+    ("work_experience", ("work experience", "experience", "employment", "professional experience")),
+    ("projects", ("projects", "personal projects", "notable work", "freelance")),
+    ("education", ("education", "academics")),
+    ("certifications", ("certifications", "licenses", "courses completed", "courses")),
+    ("achievements", ("achievements", "key contributions", "achievements or key contributions")),
+    ("languages", ("languages",)),
+]
+
+# Contact details, kept when validating a resume but never sent for questioning
+CONTACT_FIELDS = [
+    ("full_name", ("full name", "name", "candidate name")),
+    ("email", ("email", "email address", "e mail")),
+    ("phone", ("phone", "phone number", "mobile", "contact number")),
+]
+
+# Never sent to the model for questioning
+EXCLUDED_FIELDS = {alias for _, aliases in CONTACT_FIELDS for alias in aliases} | {
+    "contact", "contact info", "address", "raw text",
+}
+
+MAX_LIST_ITEMS = 8
+MAX_STRING_CHARS = 400
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception:  # tiktoken is optional, fall back to a character estimate
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def _normalise_key(key) -> str:
+    return re.sub(r"[^a-z ]+", " ", str(key).lower()).strip()
+
+
+def _load_json(value):
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        start, end = value.find("{"), value.rfind("}") + 1
+        if start != -1 and end > start:
+            try:
+                return json.loads(value[start:end])
+            except json.JSONDecodeError:
+                pass
+    return value
+
+
+def unwrap_resume(resume):
+    """Dig the parsed resume out of the stored payload (full_data, {"result": ...}, JSON strings)."""
+    resume = _load_json(resume)
+    if isinstance(resume, dict) and "parsed_resume" in resume:
+        resume = _load_json(resume["parsed_resume"])
+    if isinstance(resume, dict) and "result" in resume:
+        resume = _load_json(resume["result"])
+    return resume
+
+
+def resume_field(resume, name):
+    """Value of one RELEVANT_FIELDS entry (e.g. "skills") under any of its aliases."""
+    resume = unwrap_resume(resume)
+    if not isinstance(resume, dict):
+        return None
+    aliases = dict(RELEVANT_FIELDS)[name]
+    by_key = {_normalise_key(k): v for k, v in resume.items()}
+    return next((by_key[alias] for alias in aliases if by_key.get(alias)), None)
+
+
+def canonical_fields(resume: dict) -> dict:
+    """CONTACT_FIELDS and RELEVANT_FIELDS found in ``resume``, under canonical names."""
+    by_key = {_normalise_key(k): v for k, v in resume.items()}
+    found = {}
+    for name, aliases in CONTACT_FIELDS + RELEVANT_FIELDS:
+        value = next((by_key[alias] for alias in aliases if by_key.get(alias)), None)
+        if value is not None:
+            found[name] = value
+    return found
+
+
+def project_resume(resume) -> dict:
+    """Keep only the fields relevant to questioning, under canonical names."""
+    resume = unwrap_resume(resume)
+    if not isinstance(resume, dict):
+        # Unparseable output, keep it as free text
+        return {"resume": str(resume)}
+
+    by_key = {_normalise_key(k): v for k, v in resume.items()}
+    projected = {}
+    for name, aliases in RELEVANT_FIELDS:
+        for alias in aliases:
+            if by_key.get(alias):
+                projected[name] = by_key[alias]
+                break
+    if not projected:
+        # Unknown layout, send everything except contact details and raw text
+        projected = {k: v for k, v in resume.items() if _normalise_key(k) not in EXCLUDED_FIELDS}
+    return projected
+
+
+def _shrink(value, max_items, max_chars):
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[:max_chars].rstrip() + "…"
+    if isinstance(value, list):
+        return [_shrink(v, max_items, max_chars) for v in value[:max_items]]
+    if isinstance(value, dict):
+        return {k: _shrink(v, max_items, max_chars) for k, v in value.items()}
+    return value
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def build_resume_context(resume, budget: int):
+    """Compact resume JSON that fits ``budget`` tokens, plus its token count.
+
+    Long lists and strings are trimmed first, then the least important
+    fields are dropped until the context fits.
+    """
+    context = project_resume(resume)
+    text = _dumps(context)
+    max_items, max_chars = MAX_LIST_ITEMS, MAX_STRING_CHARS
+    while count_tokens(text) > budget and (max_items > 2 or len(context) > 1):
+        if max_items > 2:
+            max_items //= 2
+            max_chars //= 2
+            context = _shrink(context, max_items, max_chars)
+        else:
+            context.pop(next(reversed(context)))
+        text = _dumps(context)
+
+    tokens = count_tokens(text)
+    if tokens > budget:
+        text = truncate_text(text, budget)
+        tokens = count_tokens(text)
+    return text, tokens
+
+
+def truncate_text(text: str, budget: int) -> str:
+    """Cut free text down to roughly ``budget`` tokens."""
+    if count_tokens(text) <= budget:
+        return text
+    encoding = _get_encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text)[:budget]) + "…"
+    return text[:budget * 4] + "…"
@@ -0,0 +1,189 @@
+"""Validated structure for parsed resumes.
+
+The parse prompt asks for these fields; the model's JSON is validated and
+normalised here once at ingest, so stored resumes are plain objects with a
+fixed shape and interview start never re-parses LLM text.
+"""
+import json
+import re
+from typing import ClassVar, List, Optional
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
+from prompt_context import canonical_fields
+
+# Shown to the model in the structured parse prompt
+RESUME_JSON_SHAPE = """{
+  "full_name": string or null,
+  "email": string or null,
+  "phone": string or null,
+  "skills": [string],
+  "education": [{"degree": string, "institution": string, "year": string, "details": string}],
+  "work_experience": [{"title": string, "company": string, "duration": string, "description": string}],
+  "projects": [{"name": string, "description": string, "technologies": [string]}],
+  "certifications": [string],
+  "languages": [string],
+  "achievements": [string]
+}"""
+
+_LIST_SEPARATORS = re.compile(r"[,;\n•]+")
+_EMPTY_VALUES = {"", "n/a", "na", "none", "null", "-"}
+
+
+class ResumeValidationError(ValueError):
+    pass
+
+
+def _aliases(*names):
+    # Key names seen inside entries of the free-text parser's output
+    return AliasChoices(*names)
+
+
+def _flatten(value, join_entries=False):
+    if value is None:
+        return
+    if isinstance(value, str):
+        for part in _LIST_SEPARATORS.split(value):
+            part = part.strip()
+            if part.lower() not in _EMPTY_VALUES:
+                yield part
+    elif isinstance(value, dict):
+        if join_entries and all(isinstance(v, str) or v is None for v in value.values()):
+            # One entry described by fields, e.g. {"name": ..., "issuer": ...}
+            text = " - ".join(v.strip() for v in value.values() if v and v.strip())
+            if text:
+                yield text
+        else:
+            # Grouped by category, e.g. {"Languages": "Python, Go", "Tools": ["Docker"]}
+            for item in value.values():
+                yield from _flatten(item, join_entries)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _flatten(item, join_entries)
+    else:
+        yield str(value)
+
+
+def _string_list(value, join_entries=False):
+    return list(dict.fromkeys(_flatten(value, join_entries)))
+
+
+def _entry_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class _Entry(BaseModel):
+    model_config = ConfigDict(extra="ignore", coerce_numbers_to_str=True)
+    # Field that receives a bare string entry
+    text_field: ClassVar[str] = "description"
+
+    @model_validator(mode="before")
+    @classmethod
+    def _from_text(cls, value):
+        if isinstance(value, str):
+            return {cls.text_field: value}
+        if isinstance(value, dict):
+            # "Job Title" and "job_title" are the same key
+            return {re.sub(r"[^a-z0-9]+", "_", str(k).lower()).strip("_"): v for k, v in value.items()}
+        return value
+
+
+class Education(_Entry):
+    text_field: ClassVar[str] = "details"
+    degree: Optional[str] = None
+    institution: Optional[str] = Field(None, validation_alias=_aliases("institution", "school", "university"))
+    year: Optional[str] = Field(None, validation_alias=_aliases("year", "dates", "graduation_year"))
+    details: Optional[str] = None
+
+
+class WorkExperience(_Entry):
+    title: Optional[str] = Field(None, validation_alias=_aliases("title", "role", "position", "job_title"))
+    company: Optional[str] = Field(None, validation_alias=_aliases("company", "employer", "organization"))
+    duration: Optional[str] = Field(None, validation_alias=_aliases("duration", "dates", "period"))
+    description: Optional[str] = Field(None, validation_alias=_aliases("description", "responsibilities"))
+
+    @field_validator("description", mode="before")
+    @classmethod
+    def _join_bullets(cls, value):
+        return "\n".join(_flatten(value)) if isinstance(value, (list, dict)) else value
+
+
+class Project(_Entry):
+    name: Optional[str] = Field(None, validation_alias=_aliases("name", "title"))
+    description: Optional[str] = None
+    technologies: List[str] = Field(default_factory=list, validation_alias=_aliases("technologies", "tech_stack", "tools"))
+
+    @field_validator("technologies", mode="before")
+    @classmethod
+    def _technologies(cls, value):
+        return _string_list(value)
+
+
+class ParsedResume(BaseModel):
+    """Section titles are matched like prompt_context does (CONTACT_FIELDS, RELEVANT_FIELDS)."""
+    model_config = ConfigDict(extra="ignore", coerce_numbers_to_str=True)
+
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    skills: List[str] = Field(default_factory=list)
+    education: List[Education] = Field(default_factory=list)
+    work_experience: List[WorkExperience] = Field(default_factory=list)
+    projects: List[Project] = Field(default_factory=list)
+    certifications: List[str] = Field(default_factory=list)
+    languages: List[str] = Field(default_factory=list)
+    achievements: List[str] = Field(default_factory=list)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _canonical_keys(cls, value):
+        return canonical_fields(value) if isinstance(value, dict) else value
+
+    @field_validator("skills", "languages", mode="before")
+    @classmethod
+    def _strings(cls, value):
+        return _string_list(value)
+
+    @field_validator("certifications", "achievements", mode="before")
+    @classmethod
+    def _entry_strings(cls, value):
+        return _string_list(value, join_entries=True)
+
+    @field_validator("education", "work_experience", "projects", mode="before")
+    @classmethod
+    def _entries(cls, value):
+        return _entry_list(value)
+
+
+def has_content(value) -> bool:
+    """True if any string, number or nested item in ``value`` is non-empty."""
+    if isinstance(value, dict):
+        return any(has_content(v) for v in value.values())
+    if isinstance(value, list):
+        return any(has_content(v) for v in value)
+    return value not in (None, "")
+
+
+def validate_resume(content: str) -> dict:
+    """The model's JSON output as a normalised resume dict.
+
+    Raises ResumeValidationError with a message the model can act on when
+    the output isn't a JSON object of the expected shape, or has no
+    recognised field with content (e.g. ``{}`` or a wrapper object).
+    """
+    try:
+        data = json.loads(content)
+    except (TypeError, json.JSONDecodeError) as e:
+        raise ResumeValidationError(f"Output is not valid JSON: {e}")
+    if not isinstance(data, dict):
+        raise ResumeValidationError("Output must be a single JSON object")
+    try:
+        resume = ParsedResume.model_validate(data).model_dump()
+    except ValidationError as e:
+        raise ResumeValidationError(str(e))
+    if not has_content(resume):
+        raise ResumeValidationError(
+            "Output has no recognised resume fields with content; use the top-level keys "
+            f"{', '.join(ParsedResume.model_fields)} without wrapping them in another object"
+        )
+    return resume
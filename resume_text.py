@@ -0,0 +1,18 @@
+"""Resume text normalisation shared by extraction and the parse cache.
+
+Kept free of third-party imports so the API server can hash resume text
+without pulling in the PDF/DOCX extraction stack.
+"""
+
+
+def normalised_lines(text):
+    """Stripped, non-empty lines of ``text``."""
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            yield line
+
+
+def preprocess_resume_text(text):
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(normalised_lines(text))
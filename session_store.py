@@ -0,0 +1,77 @@
+import secrets
+import threading
+import time
+import os
+
+SESSION_TTL = int(os.getenv("INTERVIEW_SESSION_TTL", str(2 * 60 * 60)))
+MAX_SESSIONS = int(os.getenv("INTERVIEW_MAX_SESSIONS", "10000"))
+
+
+class InterviewSession:
+    def __init__(self, session_id, resume, email=None):
+        self.session_id = session_id
+        self.resume = resume
+        self.email = email
+        self.context_tokens = 0
+        self.history = []  # [{"question": ..., "answer": ...}]
+        self.pending_question = None
+        self.last_seen = time.monotonic()
+
+    def record_question(self, question):
+        self.pending_question = question
+
+    def record_answer(self, answer):
+        if self.pending_question is not None:
+            self.history.append({"question": self.pending_question, "answer": answer})
+            self.pending_question = None
+
+    def record_turn(self, answer, question):
+        """Answer to the pending question together with the follow-up it produced."""
+        self.record_answer(answer)
+        self.record_question(question)
+
+
+class SessionStore:
+    """In-memory interview sessions with sliding TTL expiry."""
+
+    def __init__(self, ttl=SESSION_TTL, max_sessions=MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, resume, email=None):
+        session = InterviewSession(secrets.token_urlsafe(16), resume, email)
+        with self._lock:
+            self._evict_expired()
+            # Drop the least recently used sessions when at capacity
+            while len(self._sessions) >= self.max_sessions:
+                oldest = min(self._sessions.values(), key=lambda s: s.last_seen)
+                del self._sessions[oldest.session_id]
+            self._sessions[session.session_id] = session
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            now = time.monotonic()
+            if now - session.last_seen > self.ttl:
+                del self._sessions[session_id]
+                return None
+            session.last_seen = now
+            return session
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _evict_expired(self):
+        # Caller holds self._lock
+        cutoff = time.monotonic() - self.ttl
+        for session_id in [sid for sid, s in self._sessions.items() if s.last_seen < cutoff]:
+            del self._sessions[session_id]
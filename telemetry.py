@@ -0,0 +1,214 @@
+"""Latency spans, counters and a Prometheus-style metrics surface.
+
+Spans are recorded into in-process histograms and rendered by
+render_metrics() in the Prometheus text format. When OpenTelemetry is
+installed and OTEL_EXPORTER_OTLP_ENDPOINT is set, every span is exported as
+an OpenTelemetry span as well. Both carry the correlation ID of the request
+being served, which the Streamlit app sends as X-Correlation-ID.
+"""
+import contextvars
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CORRELATION_HEADER = "X-Correlation-ID"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+correlation_id = contextvars.ContextVar("correlation_id", default=None)
+
+try:
+    if not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        raise ImportError("OpenTelemetry export not configured")
+    from opentelemetry import trace
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    _provider = TracerProvider(resource=Resource.create({
+        "service.name": os.getenv("OTEL_SERVICE_NAME", "ai-interviewer")
+    }))
+    _provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer("ai_interviewer")
+except Exception:  # OpenTelemetry is optional, metrics work without it
+    _tracer = None
+
+
+def new_correlation_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Counters and latency histograms keyed by name and labels, plus gauge collectors."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+
+    def add_collector(self, collect):
+        """Register collect() -> iterable of (name, labels dict, value), read at render time."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: {**h, "buckets": list(h["buckets"])} for key, h in self._histograms.items()}
+
+        lines, typed = [], set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for (name, labels), histogram in sorted(histograms.items()):
+            header(name, "histogram")
+            for bound, count in zip(self.buckets, histogram["buckets"]):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+
+        for collect in self._collectors:
+            try:
+                samples = list(collect())
+            except Exception:
+                # A broken collector must not take the whole endpoint down
+                continue
+            for name, labels, value in samples:
+                header(name, "gauge")
+                lines.append(f"{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.describe("stage_duration_seconds", "Time spent in each instrumented stage")
+metrics.describe("stage_errors_total", "Stages that raised an exception")
+metrics.describe("http_request_duration_seconds", "Backend request handling time until the response starts")
+metrics.describe("llm_prompt_tokens_total", "Prompt tokens sent to the LLM provider")
+metrics.describe("llm_completion_tokens_total", "Completion tokens received from the LLM provider")
+
+
+def record_duration(name, seconds, **labels):
+    """Record a stage that can't be wrapped in a span, e.g. across stream yields."""
+    metrics.observe("stage_duration_seconds", seconds, stage=name, **labels)
+
+
+@contextmanager
+def span(name, **labels):
+    """Time a block as stage ``name``; labels must be low-cardinality (endpoint, format)."""
+    started = time.perf_counter()
+    with (_tracer.start_as_current_span(name) if _tracer else nullcontext()) as otel_span:
+        if otel_span is not None:
+            if correlation_id.get():
+                otel_span.set_attribute("correlation_id", correlation_id.get())
+            for key, value in labels.items():
+                otel_span.set_attribute(key, value)
+        try:
+            yield
+        except BaseException:
+            metrics.inc("stage_errors_total", stage=name, **labels)
+            raise
+        finally:
+            record_duration(name, time.perf_counter() - started, **labels)
+
+
+def traced(name, **labels):
+    """Decorator form of span()."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def stats_collector(prefix, stats, labels=None):
+    """Gauge collector exposing the numeric values of a stats() dict as prefix_<key>."""
+    def collect():
+        for key, value in stats().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield f"{prefix}_{key}", labels or {}, value
+    return collect
+
+
+def render_metrics() -> str:
+    return metrics.render()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """Serve /metrics from a daemon thread, for processes without their own HTTP app (Streamlit)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
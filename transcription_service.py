@@ -0,0 +1,177 @@
+# transcription_service.py (FastAPI app)
+# Shared Whisper workers for all interview sessions. Run beside the LLM backend:
+#   uvicorn transcription_service:app --port 8001
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from dotenv import load_dotenv
+from Voice_transcriber import PCM_CONTENT_TYPE
+from telemetry import PROMETHEUS_CONTENT_TYPE, metrics, render_metrics, span, stats_collector
+
+load_dotenv()
+
+WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+MAX_QUEUE = int(os.getenv("TRANSCRIBE_MAX_QUEUE", "32"))
+MAX_BATCH = int(os.getenv("TRANSCRIBE_MAX_BATCH", "4"))
+# Clips longer than this (in bytes of encoded audio) are decoded on their own
+SHORT_CLIP_BYTES = int(os.getenv("TRANSCRIBE_SHORT_CLIP_BYTES", str(256 * 1024)))
+
+
+def _init_worker(model_name):
+    # Each worker process loads its model exactly once
+    import torch
+    from Voice_transcriber import warm_up
+
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // WORKERS))
+    warm_up(model_name)
+
+
+def _ping():
+    return os.getpid()
+
+
+def _transcribe_batch(clips):
+    import numpy as np
+    from Voice_transcriber import Voice_Transcriber, get_model
+
+    results = []
+    for audio_bytes, is_pcm in clips:
+        try:
+            if is_pcm:
+                audio = np.frombuffer(audio_bytes, dtype=np.float32).copy()
+                text = get_model().transcribe(audio)["text"]
+            else:
+                text = Voice_Transcriber.transcribe_local(audio_bytes)
+            results.append({"text": text})
+        except Exception as e:
+            results.append({"error": str(e)})
+    return results
+
+
+class TranscriptionQueue:
+    """Bounded request queue feeding a fixed pool of Whisper processes.
+
+    Each clip goes to the next free worker. Only while every worker is busy
+    are the short clips queued behind it handed over together, so one IPC
+    round trip serves several sessions without idling other workers.
+    """
+
+    def __init__(self, workers, max_queue, max_batch, model_name=None):
+        self.workers = workers
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(model_name,)
+        )
+        self._slots = asyncio.Semaphore(workers)
+        self._dispatcher = None
+        # Long clip taken off the queue while filling a batch, dispatched next
+        self._held = None
+
+    def start(self):
+        # Spawn every worker now so models are loaded before the first request
+        for _ in range(self.workers):
+            self.pool.submit(_ping)
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def stop(self):
+        if self._dispatcher:
+            self._dispatcher.cancel()
+        self.pool.shutdown(cancel_futures=True)
+
+    async def submit(self, audio_bytes, is_pcm=False):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait(((audio_bytes, is_pcm), future))
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Transcription queue is full, retry shortly")
+        return await future
+
+    @staticmethod
+    def _is_short(item):
+        return len(item[0][0]) <= SHORT_CLIP_BYTES
+
+    async def _dispatch(self):
+        while True:
+            if self._held is not None:
+                item, self._held = self._held, None
+            else:
+                item = await self.queue.get()
+            all_busy = self._slots.locked()
+            await self._slots.acquire()
+
+            batch = [item]
+            # Clips that queued up while waiting for a worker share it, long answers go alone
+            if all_busy and self._is_short(item):
+                while len(batch) < self.max_batch and not self.queue.empty():
+                    queued = self.queue.get_nowait()
+                    if not self._is_short(queued):
+                        self._held = queued
+                        break
+                    batch.append(queued)
+            asyncio.create_task(self._run(batch))
+
+    async def _run(self, batch):
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.pool, _transcribe_batch, [clip for clip, _ in batch]
+            )
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "queued": self.queue.qsize(),
+            "max_queue": self.queue.maxsize,
+            "max_batch": self.max_batch,
+        }
+
+
+@asynccontextmanager
+async def lifespan(app):
+    app.state.transcriber = TranscriptionQueue(
+        WORKERS, MAX_QUEUE, MAX_BATCH, os.getenv("WHISPER_MODEL")
+    )
+    app.state.transcriber.start()
+    metrics.add_collector(stats_collector("transcribe_queue", app.state.transcriber.stats))
+    yield
+    await app.state.transcriber.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.post("/transcribe/")
+async def transcribe(request: Request):
+    """Transcribe encoded audio, or raw 16 kHz float32 PCM sent as audio/x-f32le."""
+    audio_bytes = await request.body()
+    if not audio_bytes:
+        raise HTTPException(status_code=400, detail="Empty audio payload")
+    is_pcm = request.headers.get("content-type", "").startswith(PCM_CONTENT_TYPE)
+    # Queue wait plus decode and Whisper in a worker process
+    with span("transcribe_service", mode="pcm" if is_pcm else "encoded"):
+        result = await request.app.state.transcriber.submit(audio_bytes, is_pcm)
+    if "error" in result:
+        raise HTTPException(status_code=422, detail=result["error"])
+    return {"text": result["text"]}
+
+
+@app.get("/health")
+async def health(request: Request):
+    return request.app.state.transcriber.stats()
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
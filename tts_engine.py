@@ -1,49 +1,254 @@
-import pyttsx3
+import subprocess
 import tempfile
+import threading
+import hashlib
+from collections import OrderedDict
 import os
+from telemetry import metrics, span, stats_collector
 
-def text_to_speech(text: str) -> bytes:
-    """Convert text to speech with improved pyttsx3 settings"""
-    engine = pyttsx3.init()
-    
-    # Get available voices and select the best one
-    voices = engine.getProperty('voices')
-    
-    # Prefer Microsoft David Desktop if available (clearer voice)
-    preferred_voices = [
-        "HKEY_LOCAL_MACHINE\SOFTWARE\Microsoft\Speech\Voices\Tokens\TTS_MS_EN-US_DAVID_11.0",
-        "HKEY_LOCAL_MACHINE\SOFTWARE\Microsoft\Speech\Voices\Tokens\TTS_MS_EN-US_ZIRA_11.0"
-    ]
-    
-    for voice in voices:
-        if any(v in voice.id for v in preferred_voices):
-            engine.setProperty('voice', voice.id)
-            break
-    
-    # Optimized speech parameters
-    engine.setProperty('rate', 170)  # Slightly faster than normal (180-200 words/min)
-    engine.setProperty('volume', 1.0)
-    engine.setProperty('pitch', 110)  # Slightly higher pitch for clarity
-    
-    # Add pauses for punctuation
-    engine.setProperty('pause.between.sentences', 150)
-    engine.setProperty('pause.between.words', 50)
-    
+# Prefer Microsoft David Desktop if available (clearer voice)
+PREFERRED_VOICES = [
+    "HKEY_LOCAL_MACHINE\\SOFTWARE\\Microsoft\\Speech\\Voices\\Tokens\\TTS_MS_EN-US_DAVID_11.0",
+    "HKEY_LOCAL_MACHINE\\SOFTWARE\\Microsoft\\Speech\\Voices\\Tokens\\TTS_MS_EN-US_ZIRA_11.0"
+]
+
+DEFAULT_RATE = 170  # Slightly faster than normal (180-200 words/min)
+DEFAULT_PITCH = 110  # Slightly higher pitch for clarity
+
+# Compressed formats are encoded with ffmpeg from the pyttsx3 WAV output
+AUDIO_FORMATS = {
+    "wav": {"mime": "audio/wav", "args": None},
+    "ogg": {"mime": "audio/ogg", "args": ["-c:a", "libopus", "-b:a", "32k", "-f", "ogg"]},
+    "mp3": {"mime": "audio/mpeg", "args": ["-c:a", "libmp3lame", "-b:a", "48k", "-f", "mp3"]},
+}
+DEFAULT_FORMAT = os.getenv("TTS_AUDIO_FORMAT", "ogg")
+
+CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ai_interviewer_tts"))
+CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+# pyttsx3 is not reentrant, so one engine per process is shared behind a lock
+_engine = None
+_default_voice = None
+_engine_lock = threading.Lock()
+
+
+def _get_engine():
+    # Caller holds _engine_lock
+    global _engine, _default_voice
+    if _engine is None:
+        # Imported here so loading this module doesn't start a speech driver
+        import pyttsx3
+        engine = pyttsx3.init()
+
+        # Get available voices and select the best one, once
+        for voice in engine.getProperty('voices'):
+            if any(v in voice.id for v in PREFERRED_VOICES):
+                _default_voice = voice.id
+                break
+        if _default_voice is None:
+            _default_voice = engine.getProperty('voice')
+
+        engine.setProperty('volume', 1.0)
+        # Add pauses for punctuation
+        engine.setProperty('pause.between.sentences', 150)
+        engine.setProperty('pause.between.words', 50)
+        _engine = engine
+    return _engine
+
+
+class AudioCache:
+    """Content-addressed LRU of synthesized clips that spills evicted entries to disk."""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, cache_dir=CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text, voice, rate, pitch, fmt="wav"):
+        raw = "\x1f".join([text, str(voice), str(rate), str(pitch), fmt])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def path_for(self, key, fmt="wav"):
+        return os.path.join(self.cache_dir, f"{key}.{fmt}")
+
+    def get(self, key, fmt="wav"):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        try:
+            with open(self.path_for(key, fmt), "rb") as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+        self.put(key, data, fmt)
+        return data
+
+    def put(self, key, data, fmt="wav"):
+        spilled = []
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = (data, fmt)
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                old_key, (old_data, old_fmt) = self._entries.popitem(last=False)
+                self._size -= len(old_data)
+                self.evictions += 1
+                spilled.append((old_key, old_data, old_fmt))
+
+        for old_key, old_data, old_fmt in spilled:
+            self._spill(old_key, old_data, old_fmt)
+
+    def _spill(self, key, data, fmt):
+        path = self.path_for(key, fmt)
+        if os.path.exists(path):
+            return
+        # Write then rename so readers never see a partial clip
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+audio_cache = AudioCache()
+metrics.add_collector(stats_collector("tts_cache", audio_cache.stats))
+
+
+def warm_up(background=False):
+    """Start the speech engine ahead of the first question (optionally in a daemon thread)."""
+    def start():
+        with _engine_lock:
+            _get_engine()
+
+    if background:
+        thread = threading.Thread(target=start, daemon=True)
+        thread.start()
+        return thread
+    start()
+
+
+def cache_stats() -> dict:
+    return audio_cache.stats()
+
+
+def _synthesize(text: str, voice, rate: int, pitch: int) -> bytes:
     # Save to temporary WAV file
     with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
         temp_path = f.name
-    
+
     try:
-        engine.save_to_file(text, temp_path)
-        engine.runAndWait()
-        
+        with _engine_lock:
+            engine = _get_engine()
+            engine.setProperty('voice', voice or _default_voice)
+            engine.setProperty('rate', rate)
+            engine.setProperty('pitch', pitch)
+            engine.save_to_file(text, temp_path)
+            engine.runAndWait()
+
         # Read the generated audio
         with open(temp_path, "rb") as f:
-            audio_bytes = f.read()
-        return audio_bytes
+            return f.read()
     finally:
         # Clean up
         try:
             os.remove(temp_path)
-        except:
-            pass
\ No newline at end of file
+        except OSError:
+            pass
+
+
+def _encode(wav_bytes: bytes, output_format: str) -> bytes:
+    args = AUDIO_FORMATS[output_format]["args"]
+    if args is None:
+        return wav_bytes
+    proc = subprocess.run(
+        ["ffmpeg", "-nostdin", "-f", "wav", "-i", "pipe:0", "-ac", "1", *args, "pipe:1"],
+        input=wav_bytes, capture_output=True, check=True
+    )
+    return proc.stdout
+
+
+def audio_mime_type(output_format: str) -> str:
+    return AUDIO_FORMATS[output_format]["mime"]
+
+
+def _clip(text, voice, rate, pitch, output_format, fallback):
+    key = AudioCache.make_key(text, voice, rate, pitch, output_format)
+    audio_bytes = audio_cache.get(key, output_format)
+    if audio_bytes is not None:
+        return audio_bytes, output_format
+
+    wav_key = AudioCache.make_key(text, voice, rate, pitch, "wav")
+    # Left by an earlier failed encode of the same text
+    wav_bytes = audio_cache.get(wav_key, "wav") if output_format != "wav" and fallback else None
+    if wav_bytes is None:
+        with span("tts_synthesize"):
+            wav_bytes = _synthesize(text, voice, rate, pitch)
+    try:
+        with span("tts_encode", format=output_format):
+            audio_bytes = _encode(wav_bytes, output_format)
+    except (OSError, subprocess.CalledProcessError):
+        if not fallback:
+            raise
+        # e.g. ffmpeg without libopus: keep the WAV rather than synthesising again
+        audio_cache.put(wav_key, wav_bytes, "wav")
+        return wav_bytes, "wav"
+    audio_cache.put(key, audio_bytes, output_format)
+    return audio_bytes, output_format
+
+
+def text_to_speech(text: str, voice=None, rate: int = DEFAULT_RATE, pitch: int = DEFAULT_PITCH,
+                   output_format: str = "wav") -> bytes:
+    """Convert text to speech, serving repeated prompts from the audio cache"""
+    if output_format not in AUDIO_FORMATS:
+        raise ValueError(f"Unsupported audio format: {output_format}")
+
+    with span("tts", format=output_format):
+        return _clip(text, voice, rate, pitch, output_format, fallback=False)[0]
+
+
+def text_to_speech_clip(text: str, voice=None, rate: int = DEFAULT_RATE, pitch: int = DEFAULT_PITCH,
+                        output_format: str = DEFAULT_FORMAT):
+    """Like text_to_speech, but falls back to WAV when ffmpeg can't encode.
+
+    Returns (audio bytes, format actually produced).
+    """
+    if output_format not in AUDIO_FORMATS:
+        raise ValueError(f"Unsupported audio format: {output_format}")
+
+    with span("tts", format=output_format):
+        return _clip(text, voice, rate, pitch, output_format, fallback=True)